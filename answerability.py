@@ -0,0 +1,236 @@
+"""Blind-test answerability: does the snippet cover what the question asks?
+
+Question and snippet are turned into hashed word unigram and bigram features
+(stop words dropped, plural "s" stripped). Each question feature is weighted
+by its IDF over snippet-sized chunks of the filing corpus, and the score is
+the share of the question's IDF weight that the snippet (plus the cited
+companies' names and tickers) also contains. Years asked about but absent
+from the snippet are reported separately.
+
+Scoring is vectorized over a whole batch with NumPy: features are keyed by
+(item, bucket) and matched with one ``np.isin``, so the app's single-question
+check and a rescan of the dataset share one code path.
+
+    python answerability.py fit
+    python answerability.py score --db data/submissions.db --failures
+"""
+import argparse
+import json
+import os
+import re
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from corpus import DEFAULT_CORPUS_DIR, Corpus
+from search import replace_dir, tokenize
+
+DEFAULT_MODEL_DIR = Path(os.environ.get("DA_DATA_DIR", "data")) / "answerability"
+MODEL_VERSION = 1
+
+N_FEATURES = 1 << 18
+CHUNK_TOKENS = 200
+LIKELY = 0.6
+UNLIKELY = 0.3
+MAX_MISSING_TERMS = 5
+
+_BUCKET_MASK = np.uint64(N_FEATURES - 1)
+_BIGRAM_MIX = np.uint64(0x9E3779B97F4A7C15)
+YEAR_RE = re.compile(r"\b(?:19|20)\d{2}\b")
+
+STOPWORDS = frozenset("""
+    a an and are as at be by did do does for from had has have how in inc is it its of on or s so than that the
+    their this to was were what when which who will with year years company companys
+    """.split())
+
+
+def _terms(text: str) -> list[str]:
+    words = []
+    for token in tokenize(text):
+        if len(token) < 2 or token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        words.append(token)
+    return words
+
+
+def _hashes(terms: list[str]) -> np.ndarray:
+    return np.fromiter((zlib.crc32(t.encode()) for t in terms), dtype=np.uint64, count=len(terms))
+
+
+def features(terms: list[str]) -> np.ndarray:
+    """Distinct feature buckets of the unigrams and bigrams of ``terms``."""
+    uni = _hashes(terms)
+    bi = uni[:-1] * _BIGRAM_MIX + uni[1:]  # wraps around, which is fine for hashing
+    return np.unique(np.concatenate([uni, bi]) & _BUCKET_MASK)
+
+
+# ─── Fit ─────────────────────────────────────────────────────────────────────
+def fit(corpus: Corpus, out_dir: Path | str = DEFAULT_MODEL_DIR) -> int:
+    """Compute bucket IDF over ``CHUNK_TOKENS``-term chunks of every filing; returns the chunk count."""
+    out_dir = Path(out_dir)
+    df = np.zeros(N_FEATURES, dtype=np.int64)
+    n_chunks, filings = 0, corpus.filings()
+    for filing in filings:
+        terms = _terms(corpus.text(filing))
+        for i in range(0, len(terms), CHUNK_TOKENS):
+            df[features(terms[i:i + CHUNK_TOKENS])] += 1
+            n_chunks += 1
+    idf = (np.log((1 + n_chunks) / (1 + df)) + 1).astype(np.float32)
+
+    with replace_dir(out_dir) as tmp_dir:
+        np.save(tmp_dir / "idf.npy", idf)
+        meta = {"version": MODEL_VERSION, "n_features": N_FEATURES, "filings": len(filings), "chunks": n_chunks}
+        (tmp_dir / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+    return n_chunks
+
+
+# ─── Score ───────────────────────────────────────────────────────────────────
+@dataclass
+class Answerability:
+    score: float  # share of the question's IDF weight found in the snippet, 0-1
+    missing_terms: list[str] = field(default_factory=list)
+    missing_years: list[str] = field(default_factory=list)
+
+    @property
+    def status(self) -> str:
+        if self.score >= LIKELY and not self.missing_years:
+            return "likely"
+        return "unlikely" if self.score < UNLIKELY else "weak"
+
+    @property
+    def issues(self) -> list[str]:
+        issues = []
+        if self.missing_years:
+            issues.append(f"the question asks about {', '.join(self.missing_years)}, which the snippet never mentions")
+        if self.status != "likely" and self.missing_terms:
+            issues.append("the snippet doesn't mention: " + ", ".join(f"'{t}'" for t in self.missing_terms))
+        return issues
+
+    def to_dict(self) -> dict:
+        return {
+            "score": round(self.score, 3),
+            "status": self.status,
+            "missing_terms": self.missing_terms,
+            "missing_years": self.missing_years,
+        }
+
+
+class AnswerabilityScorer:
+    def __init__(self, idf: np.ndarray | None = None):
+        # Without a fitted model every feature weighs the same.
+        self.idf = idf if idf is not None else np.ones(N_FEATURES, dtype=np.float32)
+        self.fitted = idf is not None
+
+    @classmethod
+    def load(cls, model_dir: Path | str = DEFAULT_MODEL_DIR) -> "AnswerabilityScorer | None":
+        """Open the fitted model, or return None if it has not been fitted yet."""
+        model_dir = Path(model_dir)
+        if not (model_dir / "meta.json").exists():
+            return None
+        meta = json.loads((model_dir / "meta.json").read_text(encoding="utf-8"))
+        if meta["version"] != MODEL_VERSION or meta["n_features"] != N_FEATURES:
+            raise ValueError("answerability model is out of date; refit with `python answerability.py fit`")
+        return cls(np.load(model_dir / "idf.npy", mmap_mode="r"))
+
+    def score(self, question: str, snippet: str, context: str = "") -> Answerability:
+        return self.score_batch([(question, snippet, context)])[0]
+
+    def score_batch(self, items: list[tuple[str, str, str]]) -> list[Answerability]:
+        """Score (question, snippet, context) triples; context counts as part of the snippet."""
+        q_keys, s_keys, terms = [], [], []
+        for i, (question, snippet, context) in enumerate(items):
+            q_terms, s_terms = _terms(question), _terms(f"{snippet}\n{context}")
+            key = np.uint64(i) << np.uint64(32)
+            q_keys.append(features(q_terms) | key)
+            s_keys.append(features(s_terms) | key)
+            terms.append((q_terms, s_terms))
+        if not items:
+            return []
+        q_keys, s_keys = np.concatenate(q_keys), np.concatenate(s_keys)
+        found = np.isin(q_keys, s_keys, assume_unique=True)
+        item = (q_keys >> np.uint64(32)).astype(np.int64)
+        weight = self.idf[(q_keys & _BUCKET_MASK).astype(np.int64)].astype(np.float64)
+        total = np.bincount(item, weights=weight, minlength=len(items))
+        hit = np.bincount(item, weights=weight * found, minlength=len(items))
+        scores = np.divide(hit, total, out=np.zeros(len(items)), where=total > 0)
+
+        results = []
+        for i, (q_terms, s_terms) in enumerate(terms):
+            question, snippet, context = items[i]
+            present = set(s_terms)
+            missing = {t for t in q_terms if t not in present and not YEAR_RE.fullmatch(t)}
+            idf = {t: float(self.idf[zlib.crc32(t.encode()) & (N_FEATURES - 1)]) for t in missing}
+            ranked = sorted(missing, key=lambda t: (-idf[t], t))
+            years = set(YEAR_RE.findall(f"{snippet}\n{context}"))
+            missing_years = sorted({y for y in YEAR_RE.findall(question) if y not in years})
+            results.append(Answerability(float(scores[i]), ranked[:MAX_MISSING_TERMS], missing_years))
+        return results
+
+
+def record_context(record: dict) -> str:
+    """Company names and tickers of a record's cited filings."""
+    documents = record.get("documents") or [record]
+    return " ".join(f"{d.get('company', '')} {d.get('ticker', '')}" for d in documents)
+
+
+def score_records(scorer: AnswerabilityScorer, records: Iterable[dict], chunk_size: int = 1000) -> Iterator[tuple[dict, Answerability]]:
+    chunk: list[dict] = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == chunk_size:
+            yield from _score_chunk(scorer, chunk)
+            chunk = []
+    if chunk:
+        yield from _score_chunk(scorer, chunk)
+
+
+def _score_chunk(scorer: AnswerabilityScorer, records: list[dict]) -> Iterator[tuple[dict, Answerability]]:
+    items = [(r.get("question") or "", r.get("snippet") or "", record_context(r)) for r in records]
+    return zip(records, scorer.score_batch(items))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", type=Path, default=DEFAULT_MODEL_DIR)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    fit_cmd = sub.add_parser("fit", help="fit the IDF weights on the filing corpus")
+    fit_cmd.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS_DIR)
+    score_cmd = sub.add_parser("score", help="score every stored submission")
+    score_cmd.add_argument("--db")
+    score_cmd.add_argument("--chunk", type=int, default=1000)
+    score_cmd.add_argument("--failures", action="store_true", help="print each record that isn't likely answerable")
+    args = parser.parse_args()
+
+    if args.cmd == "fit":
+        n = fit(Corpus(args.corpus), args.model)
+        print(f"fitted IDF over {n} chunks into {args.model}")
+        return
+
+    from store import DEFAULT_DB_PATH, connect
+
+    scorer = AnswerabilityScorer.load(args.model)
+    if scorer is None:
+        print(f"no model at {args.model}; scoring with uniform weights (run `python answerability.py fit`)")
+        scorer = AnswerabilityScorer()
+    conn = connect(args.db or DEFAULT_DB_PATH)
+    records = (json.loads(p) for (p,) in conn.execute("SELECT payload FROM submissions ORDER BY id"))
+    statuses: Counter = Counter()
+    started, n = time.perf_counter(), 0
+    for record, result in score_records(scorer, records, args.chunk):
+        n += 1
+        statuses[result.status] += 1
+        if args.failures and result.status != "likely":
+            print(json.dumps({"record_id": record.get("record_id"), **result.to_dict()}))
+    elapsed = time.perf_counter() - started
+    print(f"scored {n} records in {elapsed:.2f}s ({n / elapsed if elapsed else 0:.0f}/s): {dict(statuses)}")
+
+
+if __name__ == "__main__":
+    main()
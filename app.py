@@ -1,8 +1,44 @@
 import streamlit as st
+import base64
+import hashlib
+import hmac
+import html
 import json
+import os
+import re
 import string
 import random
-from datetime import datetime
+import secrets
+import time
+import uuid
+from collections import deque
+from dataclasses import asdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from answerability import AnswerabilityScorer
+from calc import audit as audit_calculations
+from corpus import Corpus, Filing
+from dedup import DuplicateIndex
+from docstore import DocRef, DocumentStore
+from drafts import DraftStore
+from export import DEFAULT_EXPORT_DIR, FORMATS as EXPORT_FORMATS, ExportFilter, export as export_records
+from factcheck import check_answer
+from layout import FilingLayout, Section
+from pii import scan_fields as scan_pii
+from provenance import ProvenanceVerifier
+from render import PageRenderer
+from reuse import ReuseIndex
+from review import SORTS as REVIEW_SORTS, STATUSES as REVIEW_STATUSES, ReviewFilter, ReviewQueue
+from scheduler import Scheduler, WorkUnit
+from search import SearchIndex
+from store import SubmissionStore
+from telemetry import SessionClock, Telemetry
+from xbrl import XbrlIndex
+
+# Measured from the top of the script so the rerun timing covers all of it.
+RUN_STARTED = time.perf_counter()
 
 # ─── Page Config ─────────────────────────────────────────────────────────────
 st.set_page_config(
@@ -66,6 +102,7 @@ st.markdown("""
     .doc-viewer .doc-section { color: #6ee0a8; font-weight: 600; }
     .doc-viewer .doc-period { color: #f0c060; }
     .doc-viewer .doc-num { color: #e86060; font-weight: 700; }
+    .doc-viewer hr.doc-page-break { border: none; border-top: 1px dashed #2d2d44; margin: 0.4rem 0; }
 
     /* ── Sidebar ── */
     section[data-testid="stSidebar"] {
@@ -122,22 +159,32 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# ─── Category Config (fixed to Category A) ──────────────────────────────────
-cat = {
-    "short": "A", "label": "Simple Questions",
-    "desc": "Questions answerable from a single section of one document.",
-    "time": "10–15 min",
-    "example_q": "What was Apple's total net sales for the three months ended September 28, 2024?",
+# ─── Category Config ─────────────────────────────────────────────────────────
+CATEGORIES = {
+    "A": {
+        "short": "A", "label": "Simple Questions",
+        "desc": "Questions answerable from a single section of one document.",
+        "time": "10–15 min",
+        "example_q": "What was Apple's total net sales for the three months ended September 28, 2024?",
+        "min_docs": 1, "max_docs": 1,
+    },
+    "B": {
+        "short": "B", "label": "Hard Questions -- Single Document",
+        "desc": "Questions that combine several parts of one document, or need inference or computation.",
+        "time": "20–30 min",
+        "example_q": "By what percentage did Apple's net sales for the three months ended September 28, 2024 grow year over year?",
+        "min_docs": 1, "max_docs": 1,
+    },
+    "C": {
+        "short": "C", "label": "Hard Questions -- Multiple Documents",
+        "desc": "Questions that need information from 2 to 40 reports.",
+        "time": "30–45 min",
+        "example_q": "Which had the higher gross margin for fiscal 2024, Apple or Microsoft?",
+        "min_docs": 2, "max_docs": 40,
+    },
 }
 
 # ─── Mock Data ───────────────────────────────────────────────────────────────
-MOCK_DOCUMENT_HTML = """<span class="doc-title">Apple Inc. 10-K (Filed Oct 2024)</span>
-<span class="doc-section">Condensed Consolidated Statements of Operations (Page 23)</span>
-<span class="doc-period">Three Months Ended September 28, 2024:</span>
-Net sales: <span class="doc-num">$94,930 million</span>
-Cost of sales: <span class="doc-num">$54,890 million</span>
-Gross margin: <span class="doc-num">$40,040 million</span>"""
-
 MOCK_DOCUMENT_PLAIN = """Apple Inc. 10-K (Filed Oct 2024)
 Condensed Consolidated Statements of Operations (Page 23)
 Three Months Ended September 28, 2024:
@@ -145,29 +192,282 @@ Net sales: $94,930 million
 Cost of sales: $54,890 million
 Gross margin: $40,040 million"""
 
+# ─── Shared Resources ────────────────────────────────────────────────────────
+# Only the last few submissions are kept per session; the store has the rest.
+RECENT_WINDOW = 20
+MAX_SEARCH_RESULTS = 20
+VIEWER_PAGE_WINDOW = 2
+# Filings for a Category C task are loaded and indexed concurrently.
+LOADER_THREADS = 8
+PAY_RATE_PER_HOUR = 20.00
+# The dataset export panel is for operators, not workers.
+EXPORT_ENABLED = os.environ.get("DA_ENABLE_EXPORT") == "1"
+# Reviewers open the app with ?mode=review when this is enabled. They are the
+# signed-in accounts listed in DA_REVIEWERS (comma-separated emails), or anyone
+# who enters DA_REVIEW_SECRET; workers control neither.
+REVIEW_ENABLED = os.environ.get("DA_ENABLE_REVIEW") == "1"
+REVIEWERS = frozenset(e.strip().lower() for e in os.environ.get("DA_REVIEWERS", "").split(",") if e.strip())
+REVIEW_SECRET = os.environ.get("DA_REVIEW_SECRET", "")
+# Workers must sign in (st.login, configured under [auth] in secrets.toml) when
+# this is enabled. Only then is the worker id, and with it the reuse history,
+# out of the worker's hands.
+LOGIN_REQUIRED = os.environ.get("DA_REQUIRE_LOGIN") == "1"
+
+
+@st.cache_resource
+def get_worker_secret() -> bytes:
+    """Key for signing worker ids: $DA_WORKER_SECRET, else one generated and kept in the data dir."""
+    if os.environ.get("DA_WORKER_SECRET"):
+        return os.environ["DA_WORKER_SECRET"].encode()
+    path = Path(os.environ.get("DA_DATA_DIR", "data")) / "worker_secret"
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".tmp{os.getpid()}")
+        tmp.write_text(secrets.token_hex(32))
+        os.replace(tmp, path)
+    return path.read_text().strip().encode()
+
+
+@st.cache_resource
+def get_store() -> SubmissionStore:
+    return SubmissionStore()
+
+
+@st.cache_resource
+def get_docstore() -> DocumentStore:
+    return DocumentStore()
+
+
+@st.cache_resource
+def get_corpus() -> Corpus:
+    return Corpus(docstore=get_docstore())
+
+
+@st.cache_resource
+def get_duplicate_index() -> DuplicateIndex:
+    return DuplicateIndex(get_store())
+
+
+@st.cache_resource
+def get_draft_store() -> DraftStore:
+    return DraftStore(get_store())
+
+
+@st.cache_resource
+def get_review_queue() -> ReviewQueue:
+    return ReviewQueue(get_store())
+
+
+@st.cache_resource
+def get_reuse_index() -> ReuseIndex:
+    return ReuseIndex(get_store())
+
+
+@st.cache_resource
+def get_search_index() -> SearchIndex | None:
+    return SearchIndex.load()
+
+
+@st.cache_resource
+def get_xbrl_index() -> XbrlIndex | None:
+    return XbrlIndex.load()
+
+
+@st.cache_resource
+def get_answerability() -> AnswerabilityScorer:
+    # Falls back to unweighted terms until `python answerability.py fit` has run.
+    return AnswerabilityScorer.load() or AnswerabilityScorer()
+
+
+def filing_layout(sha: str) -> FilingLayout:
+    return DEMO_LAYOUT if sha == DEMO_FILING.sha256 else get_corpus().layout(sha)
+
+
+@st.cache_resource
+def get_renderer() -> PageRenderer:
+    return PageRenderer(get_docstore(), filing_layout)
+
+
+@st.cache_resource
+def get_verifier() -> ProvenanceVerifier:
+    return ProvenanceVerifier(get_docstore(), get_renderer().layout)
+
+
+@st.cache_resource
+def get_loader() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=LOADER_THREADS, thread_name_prefix="filing-loader")
+
+
+def _load_filing(sha: str) -> None:
+    # Fill the shared caches: text, layout and the provenance index.
+    get_docstore().get(sha)
+    get_renderer().layout(sha)
+    get_verifier().index(sha)
+
+
+def preload_filings(filings: list[Filing]) -> None:
+    """Load every filing in parallel; costs about as much as the slowest one."""
+    list(get_loader().map(_load_filing, {f.sha256 for f in filings}))
+
+
+@st.cache_resource
+def get_scheduler() -> Scheduler:
+    filings = search_index.filings if search_index is not None else [DEMO_FILING]
+    return Scheduler(get_store(), get_reuse_index(), filings, filing_layout)
+
+
+@st.cache_resource
+def get_telemetry() -> Telemetry:
+    telemetry = Telemetry()
+    telemetry.serve()
+    return telemetry
+
+
+store = get_store()
+duplicates = get_duplicate_index()
+reuse = get_reuse_index()
+review_queue = get_review_queue()
+drafts = get_draft_store()
+docstore = get_docstore()
+search_index = get_search_index()
+xbrl_index = get_xbrl_index()
+answerability = get_answerability()
+renderer = get_renderer()
+verifier = get_verifier()
+telemetry = get_telemetry()
+
+# Shown for any ticker until a local corpus has been ingested and indexed.
+DEMO_FILING = Filing(
+    filing_id="DEMO-AAPL-10-K-2024-09-28",
+    ticker="AAPL",
+    company="Apple Inc.",
+    form="10-K",
+    period="2024-09-28",
+    filed="2024-10",
+    sha256=docstore.put(MOCK_DOCUMENT_PLAIN.strip()),
+)
+DEMO_LAYOUT = FilingLayout(
+    page_labels=["23"],
+    sections=[Section(MOCK_DOCUMENT_PLAIN.index("Condensed"), 0, "Condensed Consolidated Statements of Operations")],
+)
+# Needs the demo filing when no corpus has been indexed.
+scheduler = get_scheduler()
+
 # ─── Session State ───────────────────────────────────────────────────────────
+WORKER_ID_RE = re.compile(r"WKR-[A-Z0-9]{8}")
+# .get: the attribute is missing when no auth provider is configured.
+LOGGED_IN = bool(st.user.get("is_logged_in"))
+
+
+def _sign(worker_id: str) -> str:
+    return hmac.new(get_worker_secret(), worker_id.encode(), hashlib.sha256).hexdigest()[:16]
+
+
+def stable_worker_id() -> str:
+    """The signed-in account's worker id, else the signed id carried in the URL (?worker=...)."""
+    if LOGGED_IN:
+        subject = st.user.get("email") or st.user.get("sub") or ""
+        digest = hmac.new(get_worker_secret(), subject.encode(), hashlib.sha256).digest()
+        return "WKR-" + base64.b32encode(digest).decode()[:8]
+    # Without sign-in the signature stops a worker from taking over someone
+    # else's id, but opening the app without the parameter still starts a fresh
+    # id with an empty reuse history. Set DA_REQUIRE_LOGIN=1 to close that gap.
+    worker_id, _, signature = st.query_params.get("worker", "").partition(".")
+    if WORKER_ID_RE.fullmatch(worker_id) and hmac.compare_digest(signature, _sign(worker_id)):
+        return worker_id
+    return "WKR-" + "".join(random.choices(string.ascii_uppercase + string.digits, k=8))
+
+
+if LOGIN_REQUIRED and not LOGGED_IN:
+    st.header("Sign in to start working")
+    st.button("Sign in", type="primary", on_click=st.login)
+    st.stop()
+
+if "worker_id" not in st.session_state:
+    st.session_state.worker_id = stable_worker_id()
+if not LOGGED_IN:
+    worker_token = f"{st.session_state.worker_id}.{_sign(st.session_state.worker_id)}"
+    if st.query_params.get("worker") != worker_token:
+        st.query_params["worker"] = worker_token
+
 DEFAULTS = {
     "step": 1,
-    "worker_id": "WKR-" + "".join(random.choices(string.ascii_uppercase + string.digits, k=8)),
     "earnings": 0.0,
+    "assignment_missed": False,
     "ticker": "",
+    "category": "A",
     "filing_selected": False,
+    "basket": [],
+    "citations": [],
     "snippet": "",
     "page_number": "",
     "section_name": "",
     "extraction_done": False,
+    "provenance": None,
     "question": "",
     "question_done": False,
     "reasoning": "",
     "final_answer": "",
-    "submitted_records": [],
+    "recent_records": deque(maxlen=RECENT_WINDOW),
     "show_success": False,
     "last_record": None,
+    "clock": SessionClock(),
 }
 for k, v in DEFAULTS.items():
     if k not in st.session_state:
         st.session_state[k] = v
 
+# ─── Draft Restore ───────────────────────────────────────────────────────────
+# Task state (and the text typed into the step's inputs) that survives reloads
+# and restarts; restored once per session, before any widget is created.
+DRAFT_KEYS = [
+    "step", "category", "ticker", "filing_selected", "basket", "citations", "snippet",
+    "page_number", "section_name", "extraction_done", "provenance", "question", "question_done",
+]
+DRAFT_WIDGET_RE = re.compile(r"(?:ticker|search|snippet|page|section|question|reasoning|answer)_input(?:_\d+)?")
+
+if "draft_restored" not in st.session_state:
+    draft = drafts.load(st.session_state.worker_id)
+    st.session_state.draft_restored = bool(draft)
+    if draft:
+        clock = draft.pop("clock", None)
+        if clock:
+            st.session_state.clock = SessionClock(**{**clock, "last_seen": None})
+        for k, v in draft.items():
+            st.session_state[k] = v
+        st.toast("Restored your in-progress task.")
+
+
+def draft_state() -> dict | None:
+    """Snapshot of the in-progress task, or None when nothing has been entered."""
+    widgets = {k: v for k, v in st.session_state.items() if DRAFT_WIDGET_RE.fullmatch(k) and v}
+    if st.session_state.step == 1 and not st.session_state.basket and not widgets:
+        return None
+    state = {k: st.session_state[k] for k in DRAFT_KEYS}
+    state["clock"] = asdict(st.session_state.clock)
+    return state | widgets
+
+
+def release_assignment() -> None:
+    """Give the worker's reserved sections back to the pool."""
+    scheduler.release(st.session_state.worker_id)
+    st.session_state.assignment_missed = False
+
+
+def change_category() -> None:
+    # Assignments were sized for the old category's document count.
+    st.session_state.basket = []
+    release_assignment()
+
+
+# ─── Telemetry ───────────────────────────────────────────────────────────────
+run_step = st.session_state.step
+left = st.session_state.clock.tick(run_step, time.time())
+if left is not None:
+    telemetry.step_time(st.session_state.worker_id, *left)
+# Paid for measured active time, not wall-clock time.
+st.session_state.earnings = st.session_state.clock.active_s / 3600 * PAY_RATE_PER_HOUR
+
 # ─── Sidebar ─────────────────────────────────────────────────────────────────
 with st.sidebar:
     # DA branding
@@ -179,7 +479,7 @@ with st.sidebar:
     st.markdown("#### Financial Fact Extraction")
     st.divider()
 
-    st.markdown("**Pay Rate:** `$20.00/hr`")
+    st.markdown(f"**Pay Rate:** `${PAY_RATE_PER_HOUR:.2f}/hr`")
     st.markdown(
         f"""<div class="earnings-box">
             <div class="label">Session Earnings</div>
@@ -191,17 +491,75 @@ with st.sidebar:
     st.divider()
     st.text_input("Worker ID", value=st.session_state.worker_id, disabled=True)
 
-    st.markdown(f"**Category:** {cat['label']}")
+    st.selectbox(
+        "Category",
+        list(CATEGORIES),
+        format_func=lambda c: f"{c} -- {CATEGORIES[c]['label']}",
+        key="category",
+        on_change=change_category,
+        # The basket and citations depend on the category, so lock it mid-task.
+        disabled=st.session_state.step != 1,
+    )
+    cat = CATEGORIES[st.session_state.category]
     st.caption(cat["desc"])
     st.markdown(f"**Expected Time:** {cat['time']}")
 
     st.divider()
-    st.caption(f"Tasks completed: **{len(st.session_state.submitted_records)}**")
+    st.caption(f"Tasks completed: **{store.count(st.session_state.worker_id)}**")
+
+    if EXPORT_ENABLED:
+        with st.expander("Dataset Export"):
+            export_format = st.selectbox("Format", EXPORT_FORMATS, key="export_format")
+            export_categories = st.multiselect("Categories", list(CATEGORIES), key="export_categories")
+            export_ticker = st.text_input("Ticker", key="export_ticker")
+            export_worker = st.text_input("Worker ID", key="export_worker")
+            export_dates = st.date_input("Date range", value=(), key="export_dates")
+            incremental = st.checkbox("Only records added since the last export from here", key="export_incremental")
+            if st.button("Export", key="export_run", use_container_width=True):
+                store.flush()
+                flt = ExportFilter(
+                    categories=export_categories or None,
+                    ticker=export_ticker.strip() or None,
+                    worker_id=export_worker.strip() or None,
+                    since=export_dates[0].isoformat() if export_dates else None,
+                    until=(export_dates[-1] + timedelta(days=1)).isoformat() if export_dates else None,
+                )
+                with st.spinner("Exporting..."):
+                    result = export_records(
+                        DEFAULT_EXPORT_DIR / f"submissions-{datetime.now():%Y%m%d-%H%M%S-%f}.{export_format}",
+                        flt,
+                        db_path=store.path,
+                        watermark="app" if incremental else None,
+                    )
+                st.success(f"Exported {result.records} records to `{result.path}`.")
+                st.session_state.export_path = str(result.path)
+            if st.session_state.get("export_path"):
+                export_path = Path(st.session_state.export_path)
+                # Read only when clicked, not held in memory on every rerun.
+                st.download_button(
+                    "Download", export_path.read_bytes, file_name=export_path.name,
+                    key="export_download", on_click="ignore",
+                )
 
 
 
 
 # ─── Helpers ─────────────────────────────────────────────────────────────────
+def end_run() -> None:
+    state = draft_state()
+    if state is not None:
+        drafts.save(st.session_state.worker_id, state)
+    # Keeps the worker's assigned sections reserved while they work.
+    scheduler.leases(st.session_state.worker_id)
+    telemetry.rerun(st.session_state.worker_id, run_step, time.perf_counter() - RUN_STARTED)
+
+
+def rerun() -> None:
+    """``st.rerun()``, saving the draft and timing this run first (nothing after the call executes)."""
+    end_run()
+    st.rerun()
+
+
 def qc_box(checks: list[str]):
     items = "".join(f"<li>{c}</li>" for c in checks)
     st.markdown(
@@ -213,6 +571,205 @@ def qc_box(checks: list[str]):
     )
 
 
+def find_filings(ticker: str, keywords: str) -> list[Filing]:
+    if search_index is None:
+        return [DEMO_FILING]
+    if keywords.strip():
+        hits = search_index.search(keywords, ticker=ticker, limit=MAX_SEARCH_RESULTS)
+        return [f for f, _ in hits]
+    return search_index.lookup(ticker)[:MAX_SEARCH_RESULTS]
+
+
+def open_assignment(unit: WorkUnit) -> None:
+    """Point the Step 1 search and viewer at an assigned section."""
+    st.session_state.ticker_input = unit.filing.ticker
+    st.session_state.search_input = ""
+    if any(f.filing_id == unit.filing.filing_id for f in find_filings(unit.filing.ticker, "")):
+        st.session_state.filing_choice = unit.filing.filing_id
+        st.session_state.viewer_page_search = unit.page
+
+
+def take_assignment(n: int) -> None:
+    leases = scheduler.acquire(st.session_state.worker_id, n)
+    st.session_state.assignment_missed = not leases
+    if leases:
+        open_assignment(leases[0].unit)
+
+
+def citation_context() -> str:
+    """Company names and tickers of the cited filings, which the question may name freely."""
+    return " ".join(f"{c.get('company', '')} {c['ticker']}" for c in st.session_state.citations)
+
+
+def _jump_to_section(key: str, sections: list[Section]) -> None:
+    i = st.session_state[f"viewer_section_{key}"]
+    if i is not None:
+        st.session_state[f"viewer_page_{key}"] = sections[i].page
+
+
+def doc_viewer(filing: Filing, key: str) -> None:
+    """Windowed view of a filing: only the selected pages are sent to the browser."""
+    layout = renderer.layout(filing.sha256)
+    page_key = f"viewer_page_{key}"
+    if st.session_state.get(page_key, 0) >= layout.n_pages:
+        st.session_state[page_key] = 0
+
+    if layout.n_pages > 1 or layout.sections:
+        col_sec, col_pg = st.columns([3, 1])
+        with col_sec:
+            st.selectbox(
+                "Jump to Section",
+                range(len(layout.sections)),
+                index=None,
+                format_func=lambda i: f"{layout.sections[i].name} (p. {layout.page_labels[layout.sections[i].page]})",
+                placeholder="Choose a section...",
+                key=f"viewer_section_{key}",
+                on_change=_jump_to_section,
+                args=(key, layout.sections),
+            )
+        with col_pg:
+            st.selectbox(
+                "Page",
+                range(layout.n_pages),
+                format_func=lambda i: f"p. {layout.page_labels[i]}",
+                key=page_key,
+            )
+
+    body = renderer.window(filing.sha256, st.session_state.get(page_key, 0), VIEWER_PAGE_WINDOW)
+    st.markdown(
+        f'<div class="doc-viewer"><span class="doc-title">{html.escape(filing.title)}</span>\n{body}</div>',
+        unsafe_allow_html=True,
+    )
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+#  REVIEWER MODE
+# ══════════════════════════════════════════════════════════════════════════════
+def current_reviewer() -> str | None:
+    """Name to record decisions under, or None if this session may not review."""
+    if LOGGED_IN and (st.user.get("email") or "").lower() in REVIEWERS:
+        return st.user.get("email").lower()
+    key = st.session_state.get("review_key", "")
+    if REVIEW_SECRET and key and hmac.compare_digest(key.encode(), REVIEW_SECRET.encode()):
+        return f"key:{st.session_state.worker_id}"
+    return None
+
+
+def _store_review_key() -> None:
+    # Widget state is dropped once the input is no longer rendered; keep a copy.
+    st.session_state.review_key = st.session_state.review_key_input
+
+
+if REVIEW_ENABLED and st.query_params.get("mode") == "review":
+    st.header("Review Queue")
+    reviewer = current_reviewer()
+    if reviewer is None:
+        if REVIEWERS and not LOGGED_IN:
+            st.button("Sign in as a reviewer", type="primary", on_click=st.login)
+        elif REVIEWERS:
+            st.error("This account is not on the reviewer list.")
+        if REVIEW_SECRET:
+            st.text_input("Reviewer key", type="password", key="review_key_input", on_change=_store_review_key)
+            if st.session_state.get("review_key"):
+                st.error("That reviewer key is not valid.")
+        if not REVIEWERS and not REVIEW_SECRET:
+            st.error("Review mode needs DA_REVIEWERS or DA_REVIEW_SECRET to be configured.")
+        st.stop()
+
+    counts = review_queue.counts()
+    for col, status in zip(st.columns(len(REVIEW_STATUSES)), REVIEW_STATUSES):
+        col.metric(status.title(), f"{sum(n for (_, s), n in counts.items() if s == status):,}")
+    st.caption(" · ".join(
+        f"Category {c}: " + ", ".join(f"{counts.get((c, s), 0):,} {s}" for s in REVIEW_STATUSES)
+        for c in CATEGORIES
+    ))
+
+    col_status, col_cat, col_sort = st.columns(3)
+    with col_status:
+        status = st.selectbox("Status", [*REVIEW_STATUSES, "all"], key="review_status")
+    with col_cat:
+        categories = st.multiselect("Categories", list(CATEGORIES), key="review_categories")
+    with col_sort:
+        sort = st.selectbox("Sort", REVIEW_SORTS, key="review_sort")
+    col_ticker, col_worker, col_search = st.columns([1, 1, 2])
+    with col_ticker:
+        ticker = st.text_input("Ticker", key="review_ticker")
+    with col_worker:
+        worker = st.text_input("Worker ID", key="review_worker")
+    with col_search:
+        search = st.text_input("Search questions, snippets and answers", key="review_search")
+
+    flt = ReviewFilter(None if status == "all" else status, categories, ticker, worker, search)
+    # Page cursors; back to the first page whenever the query changes.
+    query_key = repr((flt, sort))
+    if st.session_state.get("review_query") != query_key:
+        st.session_state.review_query = query_key
+        st.session_state.review_cursors = [None]
+    cursors = st.session_state.review_cursors
+    rows, next_cursor = review_queue.page(flt, sort, cursors[-1])
+
+    decisions = {}
+    if not rows:
+        st.info("No submissions match these filters.")
+    else:
+        st.caption(f"Page {len(cursors)} -- {len(rows)} submissions")
+        edited = st.data_editor(
+            [
+                {
+                    "id": r.id, "category": r.category, "ticker": r.ticker, "worker": r.worker_id,
+                    "submitted": r.timestamp[:16], "question": r.question, "answer": r.final_answer,
+                    "duplicates": r.duplicates, "check issues": r.check_issues, "status": r.status,
+                    "decision": None,
+                }
+                for r in rows
+            ],
+            column_config={
+                "decision": st.column_config.SelectboxColumn("Decision", options=list(REVIEW_STATUSES)),
+            },
+            disabled=["id", "category", "ticker", "worker", "submitted", "question", "answer", "duplicates", "check issues", "status"],
+            hide_index=True,
+            width="stretch",
+            key=f"review_editor_{st.session_state.get('review_batches', 0)}",
+        )
+        decisions = {row["id"]: row["decision"] for row in edited if row["decision"]}
+        own = [row["id"] for row in edited if row["decision"] and row["worker"] == st.session_state.worker_id]
+        if own:
+            st.warning("You can't review your own submissions; skipping " + ", ".join(f"#{i}" for i in own) + ".")
+            decisions = {i: d for i, d in decisions.items() if i not in own}
+
+    col_prev, col_next = st.columns(2)
+    with col_prev:
+        if st.button("◀ Previous Page", disabled=len(cursors) == 1, use_container_width=True):
+            cursors.pop()
+            rerun()
+    with col_next:
+        if st.button("Next Page ▶", disabled=next_cursor is None, use_container_width=True):
+            cursors.append(next_cursor)
+            rerun()
+
+    note = st.text_input("Reviewer note (applies to this batch)", key="review_note")
+    if st.button(f"Apply {len(decisions)} Decision(s)", type="primary", disabled=not decisions, use_container_width=True):
+        review_queue.decide(decisions, reviewer, note.strip(), reviewer_worker_id=st.session_state.worker_id)
+        st.session_state.review_batches = st.session_state.get("review_batches", 0) + 1
+        st.toast(f"Saved {len(decisions)} review decision(s).")
+        rerun()
+
+    if rows:
+        with st.expander("Submission Details"):
+            by_id = {r.id: r for r in rows}
+            submission_id = st.selectbox(
+                "Submission", list(by_id), format_func=lambda i: f"#{i} -- {by_id[i].ticker} -- {by_id[i].question[:80]}",
+                key="review_detail",
+            )
+            st.markdown(
+                f'<div class="json-preview">{html.escape(json.dumps(review_queue.record(submission_id), indent=2))}</div>',
+                unsafe_allow_html=True,
+            )
+
+    end_run()
+    st.stop()
+
+
 # ─── Step Indicator ──────────────────────────────────────────────────────────
 step_labels = ["① Fact Sourcing", "② Extraction", "③ Question Gen", "④ Answer & Submit"]
 
@@ -267,21 +824,129 @@ if st.session_state.step == 1:
 
     st.markdown("---")
 
+    col_assigned, col_get = st.columns([3, 1])
+    with col_get:
+        st.button(
+            "🎯  Get Assignment",
+            on_click=take_assignment,
+            args=(cat["min_docs"],),
+            help="Reserve filing sections that no other worker is on right now.",
+            use_container_width=True,
+        )
+    with col_assigned:
+        leases = scheduler.leases(st.session_state.worker_id)
+        for i, lease in enumerate(leases):
+            unit = lease.unit
+            st.button(
+                f"📄  {unit.filing.title} -- {unit.section or 'any section'}",
+                key=f"assignment_{i}",
+                on_click=open_assignment,
+                args=(unit,),
+            )
+        if leases:
+            st.caption("Reserved for you while you work on it. Click an assignment to open it below.")
+            st.button("Release", key="assignment_release", on_click=release_assignment, help="Let other workers take these sections.")
+        elif st.session_state.assignment_missed:
+            st.caption("No unassigned sections are left for you -- search for a filing below.")
+        else:
+            st.caption("Get filing sections nobody else is working on, or search for a filing yourself below.")
+
     col1, col2 = st.columns([1, 3])
     with col1:
         ticker = st.text_input("Enter Ticker Symbol", placeholder="e.g. AAPL", key="ticker_input")
+    with col2:
+        keywords = st.text_input(
+            "Search Within Filings (optional)",
+            placeholder="e.g. net sales gross margin",
+            key="search_input",
+        )
+
+    basket = [Filing(**f) for f in st.session_state.basket]
+    multi_doc = cat["max_docs"] > 1
+
+    if ticker.strip() and reuse.ticker_used(st.session_state.worker_id, ticker):
+        st.error(f"You have already submitted a task for `{ticker.strip().upper()}` -- choose a different company.")
+    elif ticker.strip():
+        facts = xbrl_index.suggest(ticker) if xbrl_index is not None else []
+        if facts:
+            with st.expander(f"Tagged XBRL facts for {ticker.strip().upper()} ({len(facts)})"):
+                st.caption("Headline figures the company tagged in its filings -- a quick way to find a fact worth asking about.")
+                st.dataframe(
+                    [{"fact": f.label, "period": f.period, "value": f.display_value(), "filing": f.filing_id} for f in facts],
+                    hide_index=True,
+                    width="stretch",
+                )
+        results = find_filings(ticker, keywords)
+        if search_index is None:
+            st.caption("No local filing corpus has been indexed yet -- showing the demo filing.")
+        if not results:
+            st.warning(f"No 10-K / 10-Q filings found for `{ticker.strip().upper()}`.")
+        else:
+            st.markdown("#### Search Results")
+            by_id = {f.filing_id: f for f in results}
+            filing_id = st.radio(
+                "Filing",
+                list(by_id),
+                format_func=lambda fid: by_id[fid].title,
+                key="filing_choice",
+                label_visibility="collapsed",
+            )
+            filing = by_id[filing_id]
+            doc_viewer(filing, "search")
+            st.markdown("")
+            ticker_used = reuse.ticker_used(st.session_state.worker_id, filing.ticker)
+            if ticker_used:
+                st.error(f"You have already submitted a task for `{filing.ticker}` -- choose a different company.")
+            if not multi_doc:
+                if st.button("✅  Select This Filing", type="primary", disabled=ticker_used, use_container_width=True):
+                    with st.spinner("Loading filing..."):
+                        preload_filings([filing])
+                    st.session_state.ticker = filing.ticker
+                    st.session_state.basket = [filing.to_dict()]
+                    st.session_state.filing_selected = True
+                    st.session_state.step = 2
+                    rerun()
+            else:
+                in_basket = any(f.filing_id == filing.filing_id for f in basket)
+                full = len(basket) >= cat["max_docs"]
+                if st.button(
+                    "➕  Add to Selection",
+                    disabled=ticker_used or in_basket or full,
+                    use_container_width=True,
+                ):
+                    st.session_state.basket = st.session_state.basket + [filing.to_dict()]
+                    rerun()
+                if in_basket:
+                    st.caption("This filing is already in your selection.")
+                elif full:
+                    st.caption(f"Category {cat['short']} allows at most {cat['max_docs']} filings.")
+    else:
+        st.info("Enter a ticker symbol above to search for SEC 10-K / 10-Q filings.")
 
-    if ticker.strip():
-        st.markdown("#### Search Result")
-        st.markdown(f'<div class="doc-viewer">{MOCK_DOCUMENT_HTML}</div>', unsafe_allow_html=True)
-        st.markdown("")
-        if st.button("✅  Select This Filing", type="primary", use_container_width=True):
-            st.session_state.ticker = ticker.strip().upper()
+    if multi_doc:
+        st.markdown(f"#### Selected Filings ({len(basket)} of {cat['min_docs']}–{cat['max_docs']})")
+        if not basket:
+            st.caption("Search for each company and add its filing to your selection.")
+        for i, f in enumerate(basket):
+            col_title, col_remove = st.columns([6, 1])
+            with col_title:
+                st.markdown(f"{i + 1}. `{f.ticker}` {html.escape(f.title)}")
+            with col_remove:
+                if st.button("Remove", key=f"basket_remove_{i}"):
+                    st.session_state.basket = [d for j, d in enumerate(st.session_state.basket) if j != i]
+                    rerun()
+        if st.button(
+            f"✅  Use These {len(basket)} Filings",
+            type="primary",
+            disabled=not cat["min_docs"] <= len(basket) <= cat["max_docs"],
+            use_container_width=True,
+        ):
+            with st.spinner(f"Loading {len(basket)} filings..."):
+                preload_filings(basket)
+            st.session_state.ticker = basket[0].ticker
             st.session_state.filing_selected = True
             st.session_state.step = 2
-            st.rerun()
-    else:
-        st.info("Enter a ticker symbol above to search for SEC 10-K / 10-Q filings.")
+            rerun()
 
     qc_box([
         "Citation includes specific page number and section name",
@@ -313,37 +978,89 @@ elif st.session_state.step == 2:
 From Apple Inc. 10-K (October 2024), Page 23, Condensed Consolidated Statements of Operations:  
 Three Months Ended September 28, 2024: Net sales: $94,930 million""")
 
-    with st.expander("Selected Filing -- Click to review", expanded=True):
-        st.markdown(f'<div class="doc-viewer">{MOCK_DOCUMENT_HTML}</div>', unsafe_allow_html=True)
+    basket = [Filing(**f) for f in st.session_state.basket]
 
-    st.markdown("---")
+    def citation_inputs(filing: Filing, i: int) -> tuple[str, str, str]:
+        with st.expander("Selected Filing -- Click to review", expanded=True):
+            doc_viewer(filing, f"extract_{i}")
 
-    snippet = st.text_area(
-        "Paste Supporting Facts Snippet",
-        height=160,
-        placeholder="Copy the relevant facts from the filing above. Include row labels, column headers, values, units, and time periods. Remember the Golden Rule!",
-        key="snippet_input",
-    )
+        st.markdown("---")
+
+        snippet = st.text_area(
+            "Paste Supporting Facts Snippet",
+            height=160,
+            placeholder="Copy the relevant facts from the filing above. Include row labels, column headers, values, units, and time periods. Remember the Golden Rule!",
+            key=f"snippet_input_{i}",
+        )
 
-    col_pg, col_sec = st.columns(2)
-    with col_pg:
-        page_number = st.text_input("Page Number", placeholder="e.g. 23", key="page_input")
-    with col_sec:
-        section_name = st.text_input("Section Name", placeholder="e.g. Statements of Operations", key="section_input")
+        col_pg, col_sec = st.columns(2)
+        with col_pg:
+            page_number = st.text_input("Page Number", placeholder="e.g. 23", key=f"page_input_{i}")
+        with col_sec:
+            section_name = st.text_input("Section Name", placeholder="e.g. Statements of Operations", key=f"section_input_{i}")
+        return snippet.strip(), page_number.strip(), section_name.strip()
+
+    if len(basket) == 1:
+        inputs = [citation_inputs(basket[0], 0)]
+    else:
+        st.caption("Cite supporting facts from every selected filing -- one snippet, page and section per filing.")
+        inputs = []
+        tabs = st.tabs([f"{i + 1}. {f.ticker} {f.form} {f.period}" for i, f in enumerate(basket)])
+        for i, (tab, filing) in enumerate(zip(tabs, basket)):
+            with tab:
+                inputs.append(citation_inputs(filing, i))
 
     st.markdown("")
-    extract_disabled = (
-        len(snippet.strip()) == 0
-        or len(page_number.strip()) == 0
-        or len(section_name.strip()) == 0
-    )
+    extract_disabled = not all(all(fields) for fields in inputs)
     if st.button("Extract & Proceed", type="primary", disabled=extract_disabled, use_container_width=True):
-        st.session_state.snippet = snippet.strip()
-        st.session_state.page_number = page_number.strip()
-        st.session_state.section_name = section_name.strip()
-        st.session_state.extraction_done = True
-        st.session_state.step = 3
-        st.rerun()
+        # Filings are verified concurrently against the shared index cache.
+        checks = list(get_loader().map(
+            lambda args: verifier.verify(args[0].sha256, *args[1]),
+            zip(basket, inputs),
+        ))
+        errors = []
+        for filing, (snippet, page_number, section_name), check in zip(basket, inputs, checks):
+            where = f" ({filing.ticker} {filing.form} {filing.period})" if len(basket) > 1 else ""
+            if not check.verified:
+                missing = "".join(f"\n- `{m.line}`" for m in check.missing) or " none of the snippet lines were found."
+                errors.append(f"This snippet could not be found in the selected filing{where}:{missing}")
+            elif any(
+                reuse.section_used(st.session_state.worker_id, filing.filing_id, name)
+                for name in (section_name, check.found_section) if name
+            ):
+                errors.append(f"You have already submitted a task from this section of this filing{where} -- explore a different part of the report.")
+        for error in errors:
+            st.error(error)
+        if not errors:
+            citations = [
+                {
+                    "filing_id": filing.filing_id,
+                    "ticker": filing.ticker,
+                    "company": filing.company,
+                    "sha256": filing.sha256,
+                    "snippet": snippet,
+                    # Cite the page the facts were actually found on.
+                    "page_number": check.found_page or page_number,
+                    "section_name": section_name,
+                    "provenance": check.to_dict(),
+                }
+                for filing, (snippet, page_number, section_name), check in zip(basket, inputs, checks)
+            ]
+            st.session_state.citations = citations
+            if len(basket) == 1:
+                st.session_state.snippet = citations[0]["snippet"]
+            else:
+                # Evaluators only see the snippet, so label each document's facts.
+                st.session_state.snippet = "\n\n".join(
+                    f"From {f.title}, page {c['page_number']}, {c['section_name']}:\n{c['snippet']}"
+                    for f, c in zip(basket, citations)
+                )
+            st.session_state.page_number = citations[0]["page_number"]
+            st.session_state.section_name = citations[0]["section_name"]
+            st.session_state.provenance = citations[0]["provenance"]
+            st.session_state.extraction_done = True
+            st.session_state.step = 3
+            rerun()
 
     if extract_disabled:
         st.caption("Fill in all fields above (snippet, page number, section name) to proceed.")
@@ -387,6 +1104,12 @@ elif st.session_state.step == 3:
     st.markdown("#### Your Extracted Snippet")
     st.code(st.session_state.snippet, language=None)
 
+    for c in st.session_state.citations:
+        prov = c["provenance"]
+        if prov["found_page"] and prov["found_page"] != prov["cited_page"]:
+            where = f" ({c['ticker']})" if len(st.session_state.citations) > 1 else ""
+            st.info(f"Page citation corrected from p. {prov['cited_page']} to p. {prov['found_page']}, where the snippet appears in the filing{where}.")
+
     st.markdown("---")
 
     question = st.text_input(
@@ -395,12 +1118,27 @@ elif st.session_state.step == 3:
         key="question_input",
     )
 
+    pii_issues = scan_pii({"question": question}).issues
+    if pii_issues:
+        st.warning("**Possible PII:**" + "".join(f"\n- {issue}" for issue in pii_issues))
+
+    if question.strip():
+        result = answerability.score(question, st.session_state.snippet, citation_context())
+        label = {
+            "likely": "Answerable from the snippet",
+            "weak": "Partly covered by the snippet",
+            "unlikely": "Probably not answerable from the snippet",
+        }[result.status]
+        st.progress(result.score, text=f"**{label}** -- {result.score:.0%} of the question's key terms appear in the snippet")
+        if result.issues:
+            st.caption("".join(f"\n- {issue}" for issue in result.issues))
+
     question_disabled = len(question.strip()) == 0
     if st.button("Proceed to Answer", type="primary", disabled=question_disabled, use_container_width=True):
         st.session_state.question = question.strip()
         st.session_state.question_done = True
         st.session_state.step = 4
-        st.rerun()
+        rerun()
 
     if question_disabled:
         st.caption("Write a question to proceed.")
@@ -452,32 +1190,105 @@ elif st.session_state.step == 4:
         key="answer_input",
     )
 
+    pii_check = scan_pii({
+        "question": st.session_state.question,
+        "reasoning": reasoning,
+        "final_answer": final_answer,
+        "snippet": st.session_state.snippet,
+    })
+    if pii_check.issues:
+        st.warning("**Possible PII:**" + "".join(f"\n- {issue}" for issue in pii_check.issues))
+
+    fact_check = calc_audit = xbrl_check = None
+    if final_answer.strip():
+        fact_check = check_answer(st.session_state.snippet, st.session_state.question, final_answer)
+        calc_audit = audit_calculations(st.session_state.snippet, reasoning, final_answer)
+        issues = fact_check.issues + calc_audit.issues
+        if xbrl_index is not None:
+            tickers = sorted({c["ticker"] for c in st.session_state.citations})
+            context = f"{st.session_state.question}\n{st.session_state.snippet}"
+            xbrl_check = xbrl_index.check(tickers, final_answer, context)
+            issues += xbrl_check.issues
+        if issues:
+            st.warning("**Automated checks:**" + "".join(f"\n- {issue}" for issue in issues))
+        elif xbrl_check is not None and xbrl_check.confirmed:
+            st.caption("✓ Answer matches the tagged XBRL value: " + ", ".join(dict.fromkeys(f.label for f in xbrl_check.confirmed)))
+        elif calc_audit.steps:
+            st.caption(f"✓ {len(calc_audit.steps)} calculation step(s) re-computed and consistent with the snippet")
+        elif fact_check.status == "derived":
+            st.caption(f"✓ Answer follows from the snippet: `{fact_check.derivation}`")
+        elif fact_check.status == "ok":
+            st.caption("✓ Answer figures appear in the snippet")
+
     submit_disabled = len(reasoning.strip()) == 0 or len(final_answer.strip()) == 0
     if st.button("Submit Task", type="primary", disabled=submit_disabled, use_container_width=True):
+        citations = st.session_state.citations
+        documents = [
+            {
+                "filing_id": c["filing_id"],
+                "ticker": c["ticker"],
+                "company": c.get("company", ""),
+                "source_document": DocRef(
+                    c["sha256"], c["provenance"].get("found_start") or 0, c["provenance"].get("found_end"),
+                    page=c["page_number"],
+                ).to_dict(),
+                "snippet": c["snippet"],
+                "page_number": c["page_number"],
+                "section_name": c["section_name"],
+                "provenance": c["provenance"],
+            }
+            for c in citations
+        ]
+        # Top-level citation fields describe the first document; `documents` has all of them.
         record = {
+            "record_id": uuid.uuid4().hex,
             "worker_id": st.session_state.worker_id,
             "category": cat["short"],
             "timestamp": datetime.now().isoformat(),
             "ticker": st.session_state.ticker,
-            "source_document": MOCK_DOCUMENT_PLAIN.strip(),
+            "tickers": sorted({d["ticker"] for d in documents}),
+            "filing_id": documents[0]["filing_id"],
+            "source_document": documents[0]["source_document"],
             "snippet": st.session_state.snippet,
             "page_number": st.session_state.page_number,
             "section_name": st.session_state.section_name,
+            "provenance": st.session_state.provenance,
             "question": st.session_state.question,
             "reasoning": reasoning.strip(),
             "final_answer": final_answer.strip(),
+            "fact_check": fact_check.to_dict() if fact_check else None,
+            "calc_audit": calc_audit.to_dict() if calc_audit else None,
+            "xbrl_check": xbrl_check.to_dict() if xbrl_check else None,
+            "pii_check": pii_check.to_dict(),
+            "answerability": answerability.score(st.session_state.question, st.session_state.snippet, citation_context()).to_dict(),
+            "documents": documents,
+            "active_seconds": round(st.session_state.clock.finish_task(), 1),
         }
-        st.session_state.submitted_records.append(record)
+        # Flag (don't block) near-duplicates of earlier work, from any worker.
+        record["duplicates"] = [m.to_dict() for m in duplicates.query(record)]
+        duplicates.add(record)
+        reuse.add(record)
+        scheduler.complete(record)
+        drafts.discard(st.session_state.worker_id)
+        telemetry.task_submitted(st.session_state.worker_id, record["category"], record["active_seconds"])
+        store.submit(record)
+        st.session_state.recent_records.append(record)
         st.session_state.last_record = record
         st.session_state.show_success = True
 
         for key in ["ticker", "snippet", "page_number", "section_name", "question", "reasoning", "final_answer"]:
             st.session_state[key] = ""
+        st.session_state.basket = []
+        st.session_state.citations = []
+        st.session_state.provenance = None
         st.session_state.filing_selected = False
         st.session_state.extraction_done = False
         st.session_state.question_done = False
         st.session_state.step = 1
-        st.rerun()
+        # Start the next task with empty inputs (and nothing left to autosave).
+        for key in [k for k in st.session_state if DRAFT_WIDGET_RE.fullmatch(k)]:
+            del st.session_state[key]
+        rerun()
 
     if submit_disabled:
         st.caption("Fill in both fields to submit.")
@@ -494,6 +1305,12 @@ elif st.session_state.step == 4:
 if st.session_state.show_success and st.session_state.last_record:
     st.session_state.show_success = False
     st.success("✅ **Task submitted successfully!**")
+    flagged = sorted({d["field"].replace("_", " ") for d in st.session_state.last_record.get("duplicates", [])})
+    if flagged:
+        st.warning(
+            f"This submission was flagged as a near-duplicate of earlier work ({', '.join(flagged)}). "
+            "Reviewers will check it -- vary your companies, sections and questions."
+        )
 
     with st.expander("Final Submission Checklist", expanded=False):
         st.markdown("""
@@ -509,3 +1326,6 @@ if st.session_state.show_success and st.session_state.last_record:
         f'<div class="json-preview">{json.dumps(st.session_state.last_record, indent=2)}</div>',
         unsafe_allow_html=True,
     )
+
+# Runs that end in rerun() were saved and timed there.
+end_run()
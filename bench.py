@@ -0,0 +1,303 @@
+"""Rerun-latency and memory benchmark for the worker app.
+
+Drives all four steps of ``app.py`` headlessly with
+``streamlit.testing.v1.AppTest``: N worker sessions run concurrently (one
+process each, against one shared data directory) and submit M tasks apiece.
+Every script rerun is timed, and the process RSS is sampled after each task so
+growth with the number of submitted records shows up per session.
+
+A synthetic corpus (one 10-K per task ticker) is generated and indexed in a
+fresh data directory first, so runs don't touch real data. Results are written
+as JSON; ``--compare`` checks them against an earlier run:
+
+    python bench.py --sessions 4 --tasks 20 --out bench_results.json
+    python bench.py --compare bench_results.json --out bench_new.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+from array import array
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from corpus import Corpus
+from docstore import DocumentStore
+from layout import FilingLayout, Section
+from search import build_index
+
+APP_PATH = Path(__file__).with_name("app.py")
+RERUN_TIMEOUT_S = 60
+STATEMENT_PAGE = 28
+SECTION_NAME = "Consolidated Statements of Operations"
+FILLER_WORDS = (
+    "revenue segment operating income margin liquidity capital expenditures fiscal quarter "
+    "products services customers risk factors competition supply chain tax rate deferred "
+    "goodwill lease obligations share repurchase dividend cash equivalents marketable securities"
+).split()
+
+
+# ─── Synthetic corpus ────────────────────────────────────────────────────────
+def task_ticker(task: int) -> str:
+    return f"BM{task:04d}"
+
+
+def task_figures(task: int) -> tuple[int, int]:
+    rng = random.Random(task)
+    net_sales = rng.randrange(10_000, 400_000)
+    return net_sales, rng.randrange(net_sales // 3, net_sales)
+
+
+def synthetic_filing(task: int, pages: int) -> tuple[str, FilingLayout]:
+    """A plain-text 10-K with ``pages`` filler pages and one income statement."""
+    rng = random.Random(-task)
+    net_sales, cost_of_sales = task_figures(task)
+    parts, offsets, sections, pos = [], [], [], 0
+    for page in range(pages):
+        offsets.append(pos)
+        if page == STATEMENT_PAGE - 1:
+            body = (
+                f"{SECTION_NAME.upper()}\n"
+                f"Net sales | $ | {net_sales:,}\n"
+                f"Cost of sales | {cost_of_sales:,}\n"
+                f"Gross margin | {net_sales - cost_of_sales:,}\n"
+            )
+            sections.append(Section(pos + 1, page, SECTION_NAME))
+        else:
+            lines = (" ".join(rng.choices(FILLER_WORDS, k=14)).capitalize() + "." for _ in range(40))
+            body = "\n".join(lines) + "\n"
+        text = "\f" + body + f"{task_ticker(task)} | 2024 Form 10-K | {page + 1}\n"
+        parts.append(text)
+        pos += len(text)
+    layout = FilingLayout(array("I", offsets), [str(p + 1) for p in range(pages)], sections)
+    return "".join(parts), layout
+
+
+def build_data_dir(data_dir: Path, tasks: int, pages: int) -> None:
+    corpus = Corpus(data_dir / "corpus", DocumentStore(data_dir / "docs"))
+    for task in range(tasks):
+        text, layout = synthetic_filing(task, pages)
+        corpus.add(
+            task_ticker(task), "10-K", "2024-09-28", text,
+            company=f"Benchmark Company {task}", filed="2024-10", layout=layout,
+        )
+    build_index(corpus, data_dir / "index")
+
+
+# ─── Sessions ────────────────────────────────────────────────────────────────
+def rss_mb() -> float:
+    """Current resident set size (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+class SessionDriver:
+    def __init__(self, session: int):
+        from streamlit.testing.v1 import AppTest
+
+        self.session = session
+        self.at = AppTest.from_file(str(APP_PATH), default_timeout=RERUN_TIMEOUT_S)
+        self.timings: list[tuple[int, str, float]] = []
+        self.task = -1
+
+    def _timed(self, action: str, widget=None) -> None:
+        started = time.perf_counter()
+        (widget or self.at).run()
+        self.timings.append((self.task, action, time.perf_counter() - started))
+        if self.at.exception:
+            raise RuntimeError(f"session {self.session} task {self.task} {action}: {self.at.exception[0].value}")
+
+    def _button(self, prefix: str):
+        return next(b for b in self.at.button if b.label.lstrip("✅ ").startswith(prefix))
+
+    def start(self) -> None:
+        self._timed("load")
+
+    def submit_task(self, task: int) -> None:
+        self.task = task
+        at = self.at
+        net_sales, cost_of_sales = task_figures(task)
+        company = f"Benchmark Company {task}"
+
+        self._timed("ticker", at.text_input(key="ticker_input").input(task_ticker(task)))
+        self._timed("select", self._button("Select").click())
+        self._timed("snippet", at.text_area(key="snippet_input_0").input(
+            f"Net sales | $ | {net_sales:,}\nCost of sales | {cost_of_sales:,}"
+        ))
+        self._timed("page", at.text_input(key="page_input_0").input(str(STATEMENT_PAGE)))
+        self._timed("section", at.text_input(key="section_input_0").input(SECTION_NAME))
+        self._timed("extract", self._button("Extract").click())
+        if at.session_state.step != 3:
+            raise RuntimeError(f"session {self.session} task {task}: extraction failed: {[e.value for e in at.error]}")
+        self._timed("question", at.text_input(key="question_input").input(
+            f"What was {company}'s gross margin for fiscal 2024?"
+        ))
+        self._timed("proceed", self._button("Proceed").click())
+        self._timed("reasoning", at.text_area(key="reasoning_input").input(
+            f"Net sales less cost of sales: ${net_sales:,} - ${cost_of_sales:,} = ${net_sales - cost_of_sales:,}"
+        ))
+        self._timed("answer", at.text_input(key="answer_input").input(f"${net_sales - cost_of_sales:,} million"))
+        self._timed("submit", self._button("Submit").click())
+        if at.session_state.step != 1:
+            raise RuntimeError(f"session {self.session} task {task}: submission failed")
+
+
+def run_session(session: int, tasks: int) -> dict:
+    started = time.perf_counter()
+    driver = SessionDriver(session)
+    rss = [rss_mb()]
+    error = ""
+    try:
+        driver.start()
+        for task in range(tasks):
+            driver.submit_task(task)
+            rss.append(rss_mb())
+    except Exception as e:  # report, don't abort the other sessions
+        error = str(e)
+    return {
+        "session": session,
+        "wall_s": time.perf_counter() - started,
+        "timings": driver.timings,
+        "rss_mb": rss,
+        "error": error,
+    }
+
+
+# ─── Reporting ───────────────────────────────────────────────────────────────
+def _stats(seconds: list[float]) -> dict:
+    if not seconds:
+        return {"n": 0}
+    ms = np.asarray(seconds) * 1000
+    return {
+        "n": len(ms),
+        "mean_ms": round(float(ms.mean()), 2),
+        "p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "p99_ms": round(float(np.percentile(ms, 99)), 2),
+        "max_ms": round(float(ms.max()), 2),
+    }
+
+
+def summarize(results: list[dict], config: dict) -> dict:
+    timings = [t for r in results for t in r["timings"]]
+    actions = sorted({a for _, a, _ in timings})
+    tasks = sorted({t for t, _, _ in timings if t >= 0})
+    sessions = []
+    for r in results:
+        rss = r["rss_mb"]
+        sessions.append({
+            "session": r["session"],
+            "wall_s": round(r["wall_s"], 2),
+            **_stats([s for _, _, s in r["timings"]]),
+            "rss_start_mb": round(rss[0], 1),
+            "rss_end_mb": round(rss[-1], 1),
+            # Per-task slope, ignoring the first task (imports, cache warm-up).
+            "rss_growth_mb_per_task": round(float(np.polyfit(range(len(rss) - 1), rss[1:], 1)[0]), 3) if len(rss) > 2 else None,
+            "error": r["error"],
+        })
+    by_task = []
+    for task in tasks:
+        rss_after = [r["rss_mb"][task + 1] for r in results if len(r["rss_mb"]) > task + 1]
+        by_task.append({
+            "task": task,
+            **_stats([s for t, _, s in timings if t == task]),
+            "rss_mb": round(float(np.mean(rss_after)), 1) if rss_after else None,
+        })
+    growth = [s["rss_growth_mb_per_task"] for s in sessions if s["rss_growth_mb_per_task"] is not None]
+    return {
+        "config": config,
+        "summary": {
+            **_stats([s for _, _, s in timings]),
+            "rss_max_mb": round(max(rss for r in results for rss in r["rss_mb"]), 1),
+            "rss_growth_mb_per_task": round(float(np.mean(growth)), 3) if growth else None,
+            "errors": sum(bool(r["error"]) for r in results),
+        },
+        "by_action": {a: _stats([s for _, act, s in timings if act == a]) for a in actions},
+        "by_task": by_task,
+        "sessions": sessions,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Summary metrics that got worse than ``baseline`` by more than ``tolerance``."""
+    regressions = []
+    for key in ("p50_ms", "p99_ms", "rss_max_mb"):
+        old, new = baseline["summary"].get(key), current["summary"].get(key)
+        if old and new and new > old * (1 + tolerance):
+            regressions.append(f"{key}: {old} -> {new} (+{(new / old - 1) * 100:.0f}%)")
+    for action, stats in current["by_action"].items():
+        old = baseline["by_action"].get(action, {}).get("p99_ms")
+        if old and stats.get("p99_ms", 0) > old * (1 + tolerance):
+            regressions.append(f"{action} p99_ms: {old} -> {stats['p99_ms']}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=4, help="concurrent worker sessions")
+    parser.add_argument("--tasks", type=int, default=10, help="tasks submitted per session")
+    parser.add_argument("--pages", type=int, default=80, help="pages per synthetic filing")
+    parser.add_argument("--data-dir", type=Path, help="benchmark data directory (default: a fresh temp dir)")
+    parser.add_argument("--out", type=Path, default=Path("bench_results.json"))
+    parser.add_argument("--compare", type=Path, help="baseline results to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs. the baseline")
+    args = parser.parse_args()
+
+    # Read the baseline first: it may be the file this run is about to overwrite.
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    data_dir = args.data_dir or Path(tempfile.mkdtemp(prefix="da-bench-"))
+    started = time.perf_counter()
+    build_data_dir(data_dir, args.tasks, args.pages)
+    print(f"built {args.tasks} synthetic filings in {data_dir} ({time.perf_counter() - started:.1f}s)")
+
+    import streamlit
+
+    config = {
+        "sessions": args.sessions,
+        "tasks": args.tasks,
+        "pages": args.pages,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "streamlit": streamlit.__version__,
+        "platform": platform.platform(),
+    }
+    # Fresh interpreters, so each session's RSS is its own. The data directory
+    # is read when the app's modules are first imported, so it goes in the env.
+    os.environ["DA_DATA_DIR"] = str(data_dir)
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(args.sessions) as pool:
+        results = pool.starmap(run_session, [(s, args.tasks) for s in range(args.sessions)])
+
+    report = summarize(results, config)
+    args.out.write_text(json.dumps(report, indent=2) + "\n")
+    s = report["summary"]
+    print(
+        f"{s['n']} reruns: p50 {s['p50_ms']} ms, p99 {s['p99_ms']} ms, max {s['max_ms']} ms; "
+        f"RSS max {s['rss_max_mb']} MB, +{s['rss_growth_mb_per_task']} MB/task -> {args.out}"
+    )
+    for r in results:
+        if r["error"]:
+            print(f"session {r['session']} failed: {r['error']}", file=sys.stderr)
+
+    failed = bool(s["errors"])
+    if baseline is not None:
+        regressions = compare(report, baseline, args.tolerance)
+        for line in regressions:
+            print(f"regression: {line}", file=sys.stderr)
+        failed = failed or bool(regressions)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+"""Re-compute the arithmetic in a Category B reasoning path.
+
+Expressions such as ``($94,930 - $85,777) / $85,777 = 10.7%`` are pulled out
+of the free-text reasoning and parsed with ``ast`` into a whitelisted tree
+(+, -, *, /, unary minus, parentheses). They are evaluated with ``Decimal``;
+nothing is passed to ``eval``. Each operand must be bound to a figure in the
+snippet, to an earlier intermediate result, or be a small constant (100, 2,
+...). The result is compared with the stated result and with the final
+answer.
+
+``audit_batch`` runs the same audit over many records in a process pool, and
+the CLI audits the stored dataset:
+
+    python calc.py --db data/submissions.db --category B
+
+The examples in ``audit`` run with ``python -m doctest calc.py``.
+"""
+import argparse
+import ast
+import json
+import operator
+import os
+import re
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from decimal import Decimal, DivisionByZero, InvalidOperation, localcontext
+from typing import Iterable, Iterator
+
+from factcheck import SCALES, Amount, extract_amounts
+
+# Bare numbers up to this size are treated as constants ("x 100", "/ 2").
+MAX_CONSTANT = Decimal(100)
+
+TOKEN_RE = re.compile(
+    r"""(?P<num>\$?\s?(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?
+            (?:\s?(?:thousands?|millions?|billions?|trillions?|bn|mn)\b)?(?:\s?%)?)
+      | (?P<op>[+*/×÷−–]|-|(?<=\s)x(?=\s))
+      | (?P<lp>\()
+      | (?P<rp>\))
+      | (?P<eq>=|≈)
+      | (?P<other>\S)""",
+    re.I | re.X,
+)
+OPS = {"×": "*", "x": "*", "X": "*", "÷": "/", "−": "-", "–": "-"}
+BIN_OPS = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv}
+UNARY_OPS = {ast.USub: operator.neg, ast.UAdd: operator.pos}
+
+
+class UnsafeExpression(ValueError):
+    pass
+
+
+@dataclass
+class CalcStep:
+    expression: str
+    computed: Decimal | None = None
+    stated: str = ""
+    matches_stated: bool | None = None
+    unbound: list[str] = field(default_factory=list)
+    error: str = ""
+
+    def to_dict(self) -> dict:
+        return {
+            "expression": self.expression,
+            "computed": None if self.computed is None else str(self.computed),
+            "stated": self.stated,
+            "matches_stated": self.matches_stated,
+            "unbound": self.unbound,
+            "error": self.error,
+        }
+
+
+@dataclass
+class CalcAudit:
+    steps: list[CalcStep] = field(default_factory=list)
+    answer_matches: bool | None = None  # None when there was nothing to compare
+
+    @property
+    def issues(self) -> list[str]:
+        issues = []
+        for step in self.steps:
+            if step.error:
+                issues.append(f"`{step.expression}`: {step.error}")
+            elif step.matches_stated is False:
+                computed = _fmt(step.computed)
+                if step.stated.endswith("%"):
+                    computed += f" ({_fmt(step.computed * 100)}%)"
+                issues.append(f"`{step.expression}` = {computed}, not {step.stated}")
+            for operand in step.unbound:
+                issues.append(f"{operand} in `{step.expression}` is not a figure from the snippet")
+        if self.answer_matches is False:
+            issues.append("the final answer does not match the result of the calculation")
+        return issues
+
+    def to_dict(self) -> dict:
+        return {
+            "steps": [s.to_dict() for s in self.steps],
+            "answer_matches": self.answer_matches,
+            "issues": self.issues,
+        }
+
+
+def _fmt(value: Decimal | None) -> str:
+    return "n/a" if value is None else f"{value:,.4f}".rstrip("0").rstrip(".")
+
+
+# ─── Safe evaluation ─────────────────────────────────────────────────────────
+def evaluate(expression: str, names: dict[str, Decimal]) -> Decimal:
+    """Evaluate an arithmetic expression over ``names`` without ``eval``."""
+    tree = ast.parse(expression, mode="eval")
+
+    def walk(node: ast.AST) -> Decimal:
+        if isinstance(node, ast.Expression):
+            return walk(node.body)
+        if isinstance(node, ast.BinOp) and type(node.op) in BIN_OPS:
+            return BIN_OPS[type(node.op)](walk(node.left), walk(node.right))
+        if isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPS:
+            return UNARY_OPS[type(node.op)](walk(node.operand))
+        if isinstance(node, ast.Name) and node.id in names:
+            return names[node.id]
+        raise UnsafeExpression(f"unsupported syntax: {type(node).__name__}")
+
+    with localcontext() as ctx:
+        ctx.prec = 28
+        ctx.traps[DivisionByZero] = True
+        return walk(tree)
+
+
+def _balance(tokens: list[tuple[str, str]]) -> list[tuple[str, str]]:
+    """Drop parentheses that open or close outside the expression run."""
+    depth, keep = 0, []
+    for kind, text in tokens:
+        if kind == "rp":
+            if depth == 0:
+                continue
+            depth -= 1
+        elif kind == "lp":
+            depth += 1
+        keep.append((kind, text))
+    while depth and keep:
+        i = max(i for i, (k, _) in enumerate(keep) if k == "lp")
+        del keep[i]
+        depth -= 1
+    return keep
+
+
+def _to_amount(raw: str) -> Amount | None:
+    amounts = extract_amounts(raw)
+    if amounts:
+        return amounts[0]
+    try:  # a bare year-like number in an expression is still a number
+        value = Decimal(raw.replace(",", "").replace("$", "").strip())
+    except InvalidOperation:
+        return None
+    return Amount(value, "", raw, 0, 0)
+
+
+# ─── Extraction ──────────────────────────────────────────────────────────────
+def extract_steps(reasoning: str) -> list[tuple[list[tuple[str, str]], str]]:
+    """(expression tokens, stated result) for every calculation in the text."""
+    steps = []
+    for line in reasoning.splitlines():
+        tokens = [(m.lastgroup, m.group().strip()) for m in TOKEN_RE.finditer(line)]
+        i = 0
+        while i < len(tokens):
+            if tokens[i][0] not in ("num", "lp"):
+                i += 1
+                continue
+            j = i
+            while j < len(tokens) and tokens[j][0] in ("num", "op", "lp", "rp"):
+                j += 1
+            run = tokens[i:j]
+            while run and run[-1][0] == "op":
+                run.pop()
+            n_nums = sum(k == "num" for k, _ in run)
+            n_ops = sum(k == "op" for k, _ in run)
+            stated = ""
+            if j + 1 < len(tokens) and tokens[j][0] == "eq" and tokens[j + 1][0] == "num":
+                stated = tokens[j + 1][1]
+            if n_nums >= 2 and n_ops >= 1:
+                steps.append((_balance(run), stated))
+                # A stated result can be the first operand of the next step.
+                i = j + 1 if stated else j
+            else:
+                i = j
+    return steps
+
+
+def audit(snippet: str, reasoning: str, final_answer: str) -> CalcAudit:
+    """Re-compute every calculation in ``reasoning``; stated results must agree within their rounding.
+
+    >>> snippet = "Net sales $94,930 and $89,498; cost of sales $54,890; other 40,040"
+    >>> audit(snippet, "($94,930 - $89,498) / $89,498 = 0.9%", "").issues
+    ['`( $94,930 - $89,498 ) / $89,498` = 0.0607 (6.0694%), not 0.9%']
+    >>> audit(snippet, "($94,930 - $89,498) / $89,498 = 6.1%", "").issues
+    []
+    >>> audit(snippet, "$94,930 / $54,890 = 1.2", "").issues
+    ['`$94,930 / $54,890` = 1.7295, not 1.2']
+    >>> audit(snippet, "40,040 + 1 = $40,042", "$40,042").issues
+    ['`40,040 + 1` = 40,041, not $40,042', 'the final answer does not match the result of the calculation']
+    """
+    snippet_amounts = extract_amounts(snippet)
+    known: list[Amount] = list(snippet_amounts)
+    result = CalcAudit()
+
+    for tokens, stated in extract_steps(reasoning):
+        names, parts, unbound = {}, [], []
+        for kind, text in tokens:
+            if kind == "num":
+                amount = _to_amount(text)
+                if amount is None:
+                    break
+                name = f"_{len(names)}"
+                value = amount.value / 100 if amount.unit == "%" else amount.value
+                names[name] = value
+                parts.append(name)
+                is_constant = not amount.unit and not amount.scaled and abs(amount.value) <= MAX_CONSTANT
+                if not is_constant and not any(amount.matches(k) for k in known):
+                    unbound.append(amount.raw)
+            elif kind == "op":
+                parts.append(OPS.get(text, text))
+            else:
+                parts.append(text)
+        expression = " ".join(t for _, t in tokens)
+        step = CalcStep(expression, unbound=unbound)
+        try:
+            step.computed = evaluate(" ".join(parts), names)
+        except (SyntaxError, UnsafeExpression, ArithmeticError) as e:
+            step.error = "could not evaluate" if isinstance(e, SyntaxError) else str(e) or type(e).__name__
+            result.steps.append(step)
+            continue
+
+        # Exact: only the written figures carry rounding.
+        computed = Amount(step.computed, "", expression, 0, 0, precision=Decimal(0))
+        if stated:
+            step.stated = stated
+            stated_amount = _to_amount(stated)
+            step.matches_stated = stated_amount is not None and _same(stated_amount, computed)
+            if stated_amount is not None:
+                known.append(stated_amount)
+        known.append(computed)
+        result.steps.append(step)
+
+    computed = [Amount(s.computed, "", "", 0, 0, precision=Decimal(0)) for s in result.steps if s.computed is not None]
+    answer_amounts = extract_amounts(final_answer)
+    if computed and answer_amounts:
+        result.answer_matches = any(_same(a, c) for a in answer_amounts for c in computed)
+    return result
+
+
+def _same(stated: Amount, computed: Amount) -> bool:
+    """Compare a written figure with a computed one, within the written figure's rounding.
+
+    Percentages may be stated for a ratio, and a scaled figure ("$5,432 million")
+    for a result computed from unscaled table figures.
+    """
+    candidates = [computed.value]
+    if stated.unit == "%":
+        candidates.append(computed.value * 100)
+    elif stated.scaled:
+        candidates += [computed.value * SCALES[s] for s in ("thousand", "million", "billion")]
+    return any(abs(stated.value - c) <= stated.precision for c in candidates)
+
+
+def audit_record(record: dict) -> CalcAudit:
+    return audit(record.get("snippet", ""), record.get("reasoning", ""), record.get("final_answer", ""))
+
+
+def _audit_chunk(records: list[dict]) -> list[dict]:
+    return [audit_record(r).to_dict() for r in records]
+
+
+def audit_batch(records: Iterable[dict], chunk_size: int = 1000, workers: int | None = None) -> Iterator[tuple[dict, dict]]:
+    """Audit records in a process pool, yielding (record, audit dict) in order."""
+    def chunks():
+        chunk = []
+        for record in records:
+            chunk.append(record)
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        for chunk in chunks():
+            pending.append((chunk, pool.submit(_audit_chunk, chunk)))
+            # Keep a bounded number of chunks in flight so memory stays flat.
+            if len(pending) > 2 * (workers or os.cpu_count() or 1):
+                chunk, future = pending.pop(0)
+                yield from zip(chunk, future.result())
+        for chunk, future in pending:
+            yield from zip(chunk, future.result())
+
+
+def main() -> None:
+    from store import DEFAULT_DB_PATH, connect
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    parser.add_argument("--category", help="only audit this category (e.g. B)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--failures", action="store_true", help="print each record with issues")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    sql, params = "SELECT payload FROM submissions", ()
+    if args.category:
+        sql, params = sql + " WHERE category = ?", (args.category,)
+    records = (json.loads(p) for (p,) in conn.execute(sql + " ORDER BY id", params))
+
+    counts: Counter = Counter()
+    started, n = time.perf_counter(), 0
+    for record, result in audit_batch(records, workers=args.workers):
+        n += 1
+        counts["no_calculation" if not result["steps"] else "issues" if result["issues"] else "passed"] += 1
+        if args.failures and result["issues"]:
+            print(json.dumps({"record_id": record.get("record_id"), **result}))
+    elapsed = time.perf_counter() - started
+    print(f"audited {n} records in {elapsed:.2f}s ({n / elapsed if elapsed else 0:.0f}/s): {dict(counts)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Local corpus of ingested 10-K / 10-Q filings.
+
+Each filing is one line in ``manifest.jsonl``; its text lives in the
+``DocumentStore`` and is referenced by hash. Filings ingested by ``ingest.py``
+also get a page/section ``FilingLayout`` under ``layouts/``.
+
+    python corpus.py add AAPL 10-K 2024-09-28 path/to/filing.txt --company "Apple Inc."
+"""
+import argparse
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from docstore import DocumentStore
+from layout import FilingLayout
+
+DEFAULT_CORPUS_DIR = Path(os.environ.get("DA_DATA_DIR", "data")) / "corpus"
+
+FORMS = ("10-K", "10-Q")
+
+
+@dataclass(frozen=True)
+class Filing:
+    filing_id: str
+    ticker: str
+    company: str
+    form: str
+    period: str  # period of report, ISO date
+    filed: str   # filing date, ISO date (may be empty)
+    sha256: str
+
+    @property
+    def title(self) -> str:
+        filed = f" (Filed {self.filed})" if self.filed else ""
+        return f"{self.company} {self.form} for period ending {self.period}{filed}"
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def make_filing_id(ticker: str, form: str, period: str) -> str:
+    return f"{ticker.upper()}-{form.upper()}-{period}"
+
+
+class Corpus:
+    def __init__(self, root: Path | str = DEFAULT_CORPUS_DIR, docstore: DocumentStore | None = None):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.root / "manifest.jsonl"
+        self.layouts_dir = self.root / "layouts"
+        self.docstore = docstore or DocumentStore()
+        self._lock = threading.Lock()
+
+    def add(
+        self, ticker: str, form: str, period: str, text: str,
+        company: str = "", filed: str = "", layout: FilingLayout | None = None,
+    ) -> Filing:
+        form = form.upper()
+        if form not in FORMS:
+            raise ValueError(f"unsupported form {form!r}; expected one of {FORMS}")
+        filing = Filing(
+            filing_id=make_filing_id(ticker, form, period),
+            ticker=ticker.upper(),
+            company=company or ticker.upper(),
+            form=form,
+            period=period,
+            filed=filed,
+            sha256=self.docstore.put(text),
+        )
+        if layout is not None:
+            self.write_layout(filing.sha256, layout)
+        self.register(filing)
+        return filing
+
+    def register(self, filing: Filing) -> None:
+        """Append a filing whose text is already in the document store."""
+        line = json.dumps(filing.to_dict(), separators=(",", ":")) + "\n"
+        with self._lock, open(self.manifest_path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+    def write_layout(self, sha: str, layout: FilingLayout) -> None:
+        self.layouts_dir.mkdir(exist_ok=True)
+        path = self.layouts_dir / f"{sha}.layout"
+        tmp = path.with_suffix(f".tmp{os.getpid()}")
+        tmp.write_bytes(layout.to_bytes())
+        os.replace(tmp, path)
+
+    def layout(self, sha: str) -> FilingLayout:
+        """Layout for the document ``sha``, or a single unnamed page if it has none."""
+        path = self.layouts_dir / f"{sha}.layout"
+        if path.exists():
+            return FilingLayout.from_bytes(path.read_bytes())
+        return FilingLayout()
+
+    def filings(self) -> list[Filing]:
+        """All filings, last write wins when a filing id was re-ingested."""
+        if not self.manifest_path.exists():
+            return []
+        by_id: dict[str, Filing] = {}
+        with open(self.manifest_path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    filing = Filing(**json.loads(line))
+                    by_id[filing.filing_id] = filing
+        return list(by_id.values())
+
+    def text(self, filing: Filing) -> str:
+        return self.docstore.get(filing.sha256)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    add = sub.add_parser("add", help="add a plain-text filing to the corpus")
+    add.add_argument("ticker")
+    add.add_argument("form", choices=FORMS)
+    add.add_argument("period", help="period of report, e.g. 2024-09-28")
+    add.add_argument("path", type=Path)
+    add.add_argument("--company", default="")
+    add.add_argument("--filed", default="")
+    add.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS_DIR)
+    args = parser.parse_args()
+
+    if args.cmd == "add":
+        corpus = Corpus(args.corpus)
+        filing = corpus.add(
+            args.ticker, args.form, args.period, args.path.read_text(encoding="utf-8"),
+            company=args.company, filed=args.filed,
+        )
+        print(f"added {filing.filing_id} ({filing.sha256[:12]})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Near-duplicate detection for submissions with MinHash + LSH.
+
+Every stored record gets a MinHash signature per field (question, snippet,
+final answer). Signatures are split into bands; each band is hashed to a
+bucket and the (field, band, bucket) rows live in an indexed SQLite table in
+the submission database. A query looks up its own buckets only, so its cost
+depends on bucket occupancy, not on how many records exist. Candidates are
+then scored by signature agreement (an estimate of Jaccard similarity).
+"""
+import hashlib
+import re
+import zlib
+from dataclasses import dataclass
+
+import numpy as np
+
+from store import SubmissionStore
+
+FIELDS = ("question", "snippet", "final_answer")
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE = 5
+THRESHOLD = 0.7
+
+_PRIME = np.uint64((1 << 32) + 15)
+_rng = np.random.default_rng(0x5EC)
+_A = _rng.integers(1, 1 << 32, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, 1 << 32, NUM_PERM, dtype=np.uint64)
+
+_NON_WORD_RE = re.compile(r"[^a-z0-9$%.]+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS minhash (
+    record_id TEXT NOT NULL,
+    field     TEXT NOT NULL,
+    sig       BLOB NOT NULL,
+    PRIMARY KEY (record_id, field)
+);
+CREATE TABLE IF NOT EXISTS lsh_buckets (
+    field     TEXT NOT NULL,
+    band      INTEGER NOT NULL,
+    bucket    INTEGER NOT NULL,
+    record_id TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_lsh_buckets ON lsh_buckets (field, band, bucket);
+"""
+# One indexed probe per band. SQLite only uses the `field` prefix of the index
+# for `(band, bucket) IN (VALUES ...)`, so spell the probes out.
+BUCKET_LOOKUP = " UNION ALL ".join(
+    ["SELECT record_id FROM lsh_buckets WHERE field = ?1 AND band = ? AND bucket = ?"] * BANDS
+)
+
+
+def shingles(text: str) -> np.ndarray:
+    """CRC32 of the character ``SHINGLE``-grams of the normalized text."""
+    text = _NON_WORD_RE.sub(" ", text.lower()).strip()
+    if len(text) < SHINGLE:
+        return np.empty(0, dtype=np.uint64)
+    grams = {text[i:i + SHINGLE] for i in range(len(text) - SHINGLE + 1)}
+    return np.fromiter((zlib.crc32(g.encode()) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+def signature(text: str) -> np.ndarray | None:
+    hashes = shingles(text)
+    if len(hashes) == 0:
+        return None
+    return ((np.outer(hashes, _A) + _B) % _PRIME).min(axis=0)
+
+
+def band_keys(sig: np.ndarray) -> list[int]:
+    """One signed 64-bit bucket key per band (fits an SQLite INTEGER)."""
+    return [
+        int.from_bytes(hashlib.blake2b(band.tobytes(), digest_size=8).digest(), "little", signed=True)
+        for band in sig.reshape(BANDS, ROWS)
+    ]
+
+
+@dataclass(frozen=True)
+class Match:
+    field: str
+    record_id: str
+    similarity: float
+
+    def to_dict(self) -> dict:
+        return {"field": self.field, "record_id": self.record_id, "similarity": round(self.similarity, 3)}
+
+
+class DuplicateIndex:
+    def __init__(self, store: SubmissionStore, threshold: float = THRESHOLD):
+        self.store = store
+        self.threshold = threshold
+        store.ensure_schema(SCHEMA)
+
+    def query(self, record: dict) -> list[Match]:
+        """Stored records whose question, snippet or answer is near ``record``'s."""
+        matches = []
+        for field in FIELDS:
+            sig = signature(record.get(field, ""))
+            if sig is None:
+                continue
+            keys = band_keys(sig)
+            params = [field] + [v for band, key in enumerate(keys) for v in (band, key)]
+            rows = self.store.query(
+                f"SELECT record_id, sig FROM minhash WHERE field = ?1 AND record_id IN ({BUCKET_LOOKUP})",
+                tuple(params),
+            )
+            for record_id, blob in rows:
+                if record_id == record.get("record_id"):
+                    continue
+                similarity = float((np.frombuffer(blob, dtype=np.uint64) == sig).mean())
+                if similarity >= self.threshold:
+                    matches.append(Match(field, record_id, similarity))
+        return sorted(matches, key=lambda m: -m.similarity)
+
+    def add(self, record: dict) -> None:
+        """Queue the record's signatures and buckets with the store's next commit."""
+        for field in FIELDS:
+            sig = signature(record.get(field, ""))
+            if sig is None:
+                continue
+            self.store.execute_async(
+                "INSERT OR REPLACE INTO minhash (record_id, field, sig) VALUES (?, ?, ?)",
+                (record["record_id"], field, sig.tobytes()),
+            )
+            for band, key in enumerate(band_keys(sig)):
+                self.store.execute_async(
+                    "INSERT INTO lsh_buckets (field, band, bucket, record_id) VALUES (?, ?, ?, ?)",
+                    (field, band, key, record["record_id"]),
+                )
@@ -0,0 +1,95 @@
+"""Content-addressed document store.
+
+Filing text is stored once under its SHA-256 and records refer to it with a
+small ``DocRef`` (hash + page + character range). Text is only read back when
+something actually needs it, via ``DocumentStore.resolve``.
+"""
+import hashlib
+import os
+import tempfile
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from pathlib import Path
+
+try:
+    import zstandard
+except ImportError:  # optional: fall back to storing plain UTF-8
+    zstandard = None
+
+DEFAULT_DOCS_DIR = Path(os.environ.get("DA_DATA_DIR", "data")) / "docs"
+# Enough filing texts in memory for a full Category C basket (40 documents).
+DOC_CACHE_SIZE = 64
+
+ZSTD_LEVEL = 10
+
+
+@dataclass(frozen=True)
+class DocRef:
+    sha256: str
+    start: int = 0
+    end: int | None = None
+    page: str = ""
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "DocRef":
+        return cls(d["sha256"], d.get("start", 0), d.get("end"), d.get("page", ""))
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class DocumentStore:
+    def __init__(self, root: Path | str = DEFAULT_DOCS_DIR, compress: bool = True):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.compress = compress and zstandard is not None
+        # Bound per-instance so each store gets its own cache.
+        self.get = lru_cache(maxsize=DOC_CACHE_SIZE)(self._load)
+
+    def _path(self, sha: str, suffix: str) -> Path:
+        return self.root / sha[:2] / f"{sha}{suffix}"
+
+    def put(self, text: str) -> str:
+        """Store ``text`` (no-op if already present) and return its hash."""
+        sha = content_hash(text)
+        if self.contains(sha):
+            return sha
+        data = text.encode("utf-8")
+        if self.compress:
+            data, suffix = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data), ".zst"
+        else:
+            suffix = ".txt"
+        path = self._path(sha, suffix)
+        path.parent.mkdir(exist_ok=True)
+        # Write-then-rename so concurrent readers never see a partial file.
+        fd, tmp = tempfile.mkstemp(dir=path.parent)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        return sha
+
+    def contains(self, sha: str) -> bool:
+        return self._path(sha, ".zst").exists() or self._path(sha, ".txt").exists()
+
+    def _load(self, sha: str) -> str:
+        path = self._path(sha, ".zst")
+        if path.exists():
+            if zstandard is None:
+                raise RuntimeError(f"{path} is zstd-compressed but 'zstandard' is not installed")
+            return zstandard.ZstdDecompressor().decompress(path.read_bytes()).decode("utf-8")
+        path = self._path(sha, ".txt")
+        if path.exists():
+            # Decode the bytes as stored: read_text would translate \r\n and
+            # shift every offset after it away from the hashed text.
+            return path.read_bytes().decode("utf-8")
+        raise KeyError(f"document {sha} not found in {self.root}")
+
+    def resolve(self, ref: DocRef | dict) -> str:
+        """Rehydrate the text a ref points to."""
+        if isinstance(ref, dict):
+            ref = DocRef.from_dict(ref)
+        return self.get(ref.sha256)[ref.start:ref.end]
@@ -0,0 +1,98 @@
+"""Write-behind autosave of in-progress tasks, keyed by worker id.
+
+The app hands its task state to ``save()`` at the end of every rerun. Saves
+only replace the worker's pending snapshot in memory; a background thread
+writes the latest snapshot per worker at most once every ``DEBOUNCE_S``
+through the submission store's group commits, so keystroke-driven reruns
+never wait on disk. Unchanged snapshots are not written again.
+"""
+import atexit
+import json
+import threading
+import time
+
+from store import SubmissionStore
+
+DEBOUNCE_S = 2.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS drafts (
+    worker_id  TEXT PRIMARY KEY,
+    updated_at REAL NOT NULL,
+    payload    TEXT NOT NULL
+);
+"""
+
+
+class DraftStore:
+    def __init__(self, store: SubmissionStore, debounce_s: float = DEBOUNCE_S):
+        self.store = store
+        self.debounce_s = debounce_s
+        store.ensure_schema(SCHEMA)
+
+        self._cond = threading.Condition()
+        self._pending: dict[str, str] = {}
+        # Last payload handed to the store per worker, to skip unchanged saves.
+        self._written: dict[str, str] = {}
+        self._closed = False
+        self._writer = threading.Thread(target=self._run, name="draft-writer", daemon=True)
+        self._writer.start()
+        # Registered after the store's, so it runs first and the store drains it.
+        atexit.register(self.close)
+
+    def save(self, worker_id: str, state: dict) -> None:
+        """Replace the worker's pending snapshot; returns without touching disk."""
+        payload = json.dumps(state, sort_keys=True, separators=(",", ":"))
+        with self._cond:
+            if self._closed:
+                return
+            if payload == self._written.get(worker_id):
+                self._pending.pop(worker_id, None)
+            else:
+                self._pending[worker_id] = payload
+
+    def discard(self, worker_id: str) -> None:
+        """Drop the worker's draft (e.g. after the task was submitted)."""
+        with self._cond:
+            self._pending.pop(worker_id, None)
+            self._written.pop(worker_id, None)
+            self.store.execute_async("DELETE FROM drafts WHERE worker_id = ?", (worker_id,))
+
+    def load(self, worker_id: str) -> dict | None:
+        with self._cond:
+            payload = self._pending.get(worker_id) or self._written.get(worker_id)
+        if payload is None:
+            rows = self.store.query("SELECT payload FROM drafts WHERE worker_id = ?", (worker_id,))
+            payload = rows[0][0] if rows else None
+        return json.loads(payload) if payload else None
+
+    def flush(self) -> None:
+        """Hand every pending snapshot to the store now."""
+        now = time.time()
+        # Queue under the lock so a concurrent discard() can't be overtaken.
+        with self._cond:
+            batch, self._pending = self._pending, {}
+            self._written.update(batch)
+            for worker_id, payload in batch.items():
+                self.store.execute_async(
+                    "INSERT OR REPLACE INTO drafts (worker_id, updated_at, payload) VALUES (?, ?, ?)",
+                    (worker_id, now, payload),
+                )
+
+    def close(self) -> None:
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._writer.join()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._closed:
+                    self._cond.wait(timeout=self.debounce_s)
+                closed = self._closed
+            self.flush()
+            if closed:
+                return
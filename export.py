@@ -0,0 +1,215 @@
+"""Streaming export of stored submissions to JSONL or Parquet.
+
+Records are read from the submission database in fixed-size chunks (keyset
+pagination on the row id) and written chunk by chunk, one Parquet row group
+per chunk, so memory stays flat however many records exist. Filters map onto
+the indexed columns of ``submissions``.
+
+Incremental exports keep a named watermark (the last exported row id) in the
+database; the next export with the same name only picks up newer records.
+
+    python export.py out.jsonl --category B --since 2024-10-01
+    python export.py out.parquet --watermark nightly
+"""
+import argparse
+import json
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = pq = None
+
+from store import DEFAULT_DB_PATH, connect
+
+DEFAULT_EXPORT_DIR = Path(os.environ.get("DA_DATA_DIR", "data")) / "exports"
+EXPORT_CHUNK = 1000
+FORMATS = ("jsonl", "parquet")
+
+WATERMARK_SCHEMA = """
+CREATE TABLE IF NOT EXISTS export_watermarks (
+    name       TEXT PRIMARY KEY,
+    last_id    INTEGER NOT NULL,
+    updated_at TEXT NOT NULL
+);
+"""
+
+# Flat columns for Parquet; nested parts of a record are kept as JSON strings.
+COLUMNS = (
+    "record_id", "worker_id", "category", "timestamp", "ticker", "filing_id", "snippet",
+    "page_number", "section_name", "question", "reasoning", "final_answer",
+)
+JSON_COLUMNS = (
+    "source_document", "provenance", "fact_check", "calc_audit", "xbrl_check", "pii_check", "answerability",
+    "duplicates", "documents",
+)
+
+
+@dataclass
+class ExportFilter:
+    categories: list[str] | None = None
+    ticker: str | None = None
+    worker_id: str | None = None
+    since: str | None = None  # ISO date/time, inclusive
+    until: str | None = None  # ISO date/time, exclusive
+
+    def where(self) -> tuple[str, list]:
+        clauses, params = [], []
+        if self.categories:
+            clauses.append(f"category IN ({','.join('?' * len(self.categories))})")
+            params += self.categories
+        if self.ticker:
+            # Multi-document records list every ticker; the column holds the first.
+            clauses.append("(ticker = ? OR EXISTS (SELECT 1 FROM json_each(payload, '$.tickers') WHERE value = ?))")
+            params += [self.ticker.upper()] * 2
+        if self.worker_id:
+            clauses.append("worker_id = ?")
+            params.append(self.worker_id)
+        if self.since:
+            clauses.append("ts >= ?")
+            params.append(self.since)
+        if self.until:
+            clauses.append("ts < ?")
+            params.append(self.until)
+        return " AND ".join(clauses), params
+
+
+@dataclass
+class ExportResult:
+    path: Path
+    records: int
+    last_id: int
+    seconds: float
+
+
+def iter_chunks(
+    conn: sqlite3.Connection, flt: ExportFilter, after_id: int = 0, chunk_size: int = EXPORT_CHUNK,
+) -> Iterator[tuple[int, list[dict]]]:
+    """(last row id, records) per chunk, in row id order."""
+    where, params = flt.where()
+    sql = "SELECT id, payload FROM submissions WHERE id > ?" + (f" AND {where}" if where else "") + " ORDER BY id LIMIT ?"
+    while True:
+        rows = conn.execute(sql, [after_id, *params, chunk_size]).fetchall()
+        if not rows:
+            return
+        after_id = rows[-1][0]
+        yield after_id, [json.loads(p) for _, p in rows]
+
+
+# ─── Writers ─────────────────────────────────────────────────────────────────
+class _JsonlWriter:
+    def __init__(self, path: Path):
+        self.f = open(path, "w", encoding="utf-8")
+
+    def write(self, records: list[dict]) -> None:
+        self.f.write("".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records))
+
+    def close(self) -> None:
+        self.f.close()
+
+
+class _ParquetWriter:
+    def __init__(self, path: Path):
+        if pa is None:
+            raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+        self.schema = pa.schema(
+            [(c, pa.string()) for c in COLUMNS]
+            + [("tickers", pa.list_(pa.string())), ("active_seconds", pa.float64())]
+            + [(c, pa.string()) for c in JSON_COLUMNS]
+        )
+        self.writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+
+    def write(self, records: list[dict]) -> None:
+        rows = []
+        for r in records:
+            row = {c: r.get(c) for c in COLUMNS}
+            row["tickers"] = r.get("tickers") or [r.get("ticker")]
+            row["active_seconds"] = r.get("active_seconds")
+            row.update({c: json.dumps(r[c]) if r.get(c) is not None else None for c in JSON_COLUMNS})
+            rows.append(row)
+        self.writer.write_table(pa.Table.from_pylist(rows, schema=self.schema))
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+# ─── Export ──────────────────────────────────────────────────────────────────
+def get_watermark(conn: sqlite3.Connection, name: str) -> int:
+    conn.executescript(WATERMARK_SCHEMA)
+    row = conn.execute("SELECT last_id FROM export_watermarks WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else 0
+
+
+def set_watermark(conn: sqlite3.Connection, name: str, last_id: int) -> None:
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO export_watermarks (name, last_id, updated_at) VALUES (?, ?, datetime('now'))",
+            (name, last_id),
+        )
+
+
+def export(
+    out_path: Path | str,
+    flt: ExportFilter | None = None,
+    fmt: str | None = None,
+    db_path: Path | str = DEFAULT_DB_PATH,
+    watermark: str | None = None,
+    chunk_size: int = EXPORT_CHUNK,
+) -> ExportResult:
+    """Write matching records to ``out_path``; advances ``watermark`` if one is named."""
+    out_path = Path(out_path)
+    fmt = fmt or out_path.suffix.lstrip(".")
+    if fmt not in FORMATS:
+        raise ValueError(f"unsupported format {fmt!r}; expected one of {FORMATS}")
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+
+    started = time.perf_counter()
+    conn = connect(db_path)
+    try:
+        after_id = get_watermark(conn, watermark) if watermark else 0
+        last_id, n = after_id, 0
+        # Write next to the target and swap it in, so readers never see a partial file.
+        tmp = out_path.with_name(f".{out_path.name}.tmp{os.getpid()}")
+        writer = _ParquetWriter(tmp) if fmt == "parquet" else _JsonlWriter(tmp)
+        try:
+            for last_id, records in iter_chunks(conn, flt or ExportFilter(), after_id, chunk_size):
+                writer.write(records)
+                n += len(records)
+        finally:
+            writer.close()
+        os.replace(tmp, out_path)
+        if watermark and last_id > after_id:
+            set_watermark(conn, watermark, last_id)
+    finally:
+        conn.close()
+    return ExportResult(out_path, n, last_id, time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("out", type=Path, help="output file (.jsonl or .parquet)")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    parser.add_argument("--format", choices=FORMATS, help="default: from the output file extension")
+    parser.add_argument("--category", action="append", help="repeat for several categories")
+    parser.add_argument("--ticker")
+    parser.add_argument("--worker")
+    parser.add_argument("--since", help="ISO date or time, inclusive")
+    parser.add_argument("--until", help="ISO date or time, exclusive")
+    parser.add_argument("--watermark", help="export only records newer than this named watermark, then advance it")
+    parser.add_argument("--chunk", type=int, default=EXPORT_CHUNK)
+    args = parser.parse_args()
+
+    flt = ExportFilter(args.category, args.ticker, args.worker, args.since, args.until)
+    result = export(args.out, flt, args.format, args.db, args.watermark, args.chunk)
+    rate = result.records / result.seconds if result.seconds else 0
+    print(f"exported {result.records} records to {result.path} in {result.seconds:.2f}s ({rate:.0f}/s); last id {result.last_id}")
+
+
+if __name__ == "__main__":
+    main()
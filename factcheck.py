@@ -0,0 +1,259 @@
+"""Numeric fact extraction and answer-consistency checks.
+
+Pulls monetary amounts, percentages, scale words and fiscal periods out of
+free text, normalizes them to ``Decimal`` values with units, and checks that
+every number in a final answer appears in (or follows from) the snippet.
+
+All patterns are compiled once at import. ``check_batch`` is the same check
+over an iterable of records, and the CLI re-checks the whole stored dataset:
+
+    python factcheck.py --db data/submissions.db
+"""
+import argparse
+import itertools
+import json
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Iterable, Iterator
+
+MAX_DERIVATION_OPERANDS = 30
+
+SCALES = {
+    "thousand": Decimal(10) ** 3, "k": Decimal(10) ** 3,
+    "million": Decimal(10) ** 6, "mm": Decimal(10) ** 6, "m": Decimal(10) ** 6, "mn": Decimal(10) ** 6,
+    "billion": Decimal(10) ** 9, "bn": Decimal(10) ** 9, "b": Decimal(10) ** 9,
+    "trillion": Decimal(10) ** 12, "tn": Decimal(10) ** 12,
+}
+MONTHS = (
+    "january|february|march|april|may|june|july|august|september|october|november|december"
+    "|jan|feb|mar|apr|jun|jul|aug|sep|sept|oct|nov|dec"
+)
+
+AMOUNT_RE = re.compile(
+    r"""(?P<neg>\(|(?<![\w.])[-−])?
+        (?P<cur>\$|US\$|USD\s?)?\s?
+        (?P<num>\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?)
+        (?![\d/])(?!-[kq]\b)\)?
+        (?:\s?(?P<scale>thousands?|millions?|billions?|trillions?|mm|mn|bn|tn|[kmb])\b)?
+        (?:\s?(?P<pct>%|percent\b|per\s+cent\b))?""",
+    re.I | re.X,
+)
+PERIOD_RE = re.compile(
+    rf"""(?P<months>three|six|nine|twelve|3|6|9|12)[\s-]+months?\s+ended\s+(?P<m_date>(?:{MONTHS})\.?\s+\d{{1,2}},\s+\d{{4}})
+      | (?:fiscal\s+)?years?\s+ended\s+(?P<y_date>(?:{MONTHS})\.?\s+\d{{1,2}},\s+\d{{4}})
+      | (?P<quarter>q[1-4]|(?:first|second|third|fourth)\s+quarter)\s+(?:of\s+)?(?:fiscal\s+|fy\s?)?(?P<q_year>\d{{4}})
+      | (?:fiscal\s+(?:year\s+)?|fy\s?)(?P<fy>\d{{4}}|\d{{2}})\b
+      | (?P<date>(?:{MONTHS})\.?\s+\d{{1,2}},\s+\d{{4}})""",
+    re.I | re.X,
+)
+YEAR_RE = re.compile(r"(?:19|20)\d{2}")
+# Worst last: a check reports the worst status of any figure in the answer.
+STATUS_ORDER = ("ok", "derived", "not_found")
+QUARTERS = {"first": "Q1", "second": "Q2", "third": "Q3", "fourth": "Q4"}
+MONTH_WORDS = {"three": 3, "six": 6, "nine": 9, "twelve": 12}
+
+
+@dataclass(frozen=True)
+class Amount:
+    value: Decimal   # fully scaled: "$94,930 million" -> 94930000000
+    unit: str        # "USD", "%" or "" for a bare number
+    raw: str
+    start: int
+    end: int
+    scaled: bool = False  # carried an explicit scale word
+    precision: Decimal = Decimal(1)  # half a unit in the last written digit, scaled
+
+    def matches(self, other: "Amount") -> bool:
+        """Same quantity, allowing for rounding and for unscaled table figures."""
+        if self.unit and other.unit and self.unit != other.unit:
+            return False
+        tolerance = max(self.precision, other.precision)
+        if abs(self.value - other.value) <= tolerance:
+            return True
+        if self.unit == "%" or other.unit == "%" or self.scaled == other.scaled:
+            return False
+        # Financial tables state "(in millions)" once in the header, so an
+        # unscaled figure may stand for a scaled one.
+        scaled, bare = (self, other) if self.scaled else (other, self)
+        return any(
+            abs(scaled.value - bare.value * f) <= tolerance
+            for f in (SCALES["thousand"], SCALES["million"], SCALES["billion"])
+        )
+
+
+@dataclass(frozen=True)
+class Period:
+    key: str  # e.g. "3M:2024-09-28", "Q4:2024", "FY:2024", "D:2024-09-28"
+    raw: str
+
+
+@dataclass
+class FactCheck:
+    status: str  # "ok", "derived", "not_found" or "no_number"
+    issues: list[str] = field(default_factory=list)
+    derivation: str = ""
+
+    @property
+    def passed(self) -> bool:
+        return self.status in ("ok", "derived") and not self.issues
+
+    def to_dict(self) -> dict:
+        return {"status": self.status, "issues": self.issues, "derivation": self.derivation}
+
+
+# ─── Extraction ──────────────────────────────────────────────────────────────
+def _iso(date_text: str) -> str:
+    text = re.sub(r"\s+", " ", date_text.replace(".", "")).strip()
+    for fmt in ("%B %d, %Y", "%b %d, %Y"):
+        try:
+            return datetime.strptime(text, fmt).date().isoformat()
+        except ValueError:
+            pass
+    return text.lower()
+
+
+def extract_periods(text: str) -> list[Period]:
+    periods = []
+    for m in PERIOD_RE.finditer(text):
+        if m["months"]:
+            n = MONTH_WORDS.get(m["months"].lower(), m["months"])
+            key = f"{n}M:{_iso(m['m_date'])}"
+        elif m["y_date"]:
+            key = f"12M:{_iso(m['y_date'])}"
+        elif m["quarter"]:
+            q = m["quarter"].lower()
+            key = f"{QUARTERS.get(q.split()[0], q.upper())}:{m['q_year']}"
+        elif m["fy"]:
+            year = m["fy"] if len(m["fy"]) == 4 else "20" + m["fy"]
+            key = f"FY:{year}"
+        else:
+            key = f"D:{_iso(m['date'])}"
+        periods.append(Period(key, m.group()))
+    return periods
+
+
+def extract_amounts(text: str) -> list[Amount]:
+    """Monetary amounts, percentages and plain figures, skipping dates and years."""
+    taken = [m.span() for m in PERIOD_RE.finditer(text)]
+    amounts = []
+    for m in AMOUNT_RE.finditer(text):
+        start, end = m.span()
+        if any(s <= start < e or s < end <= e for s, e in taken):
+            continue
+        num, cur, scale, pct = m["num"], m["cur"], m["scale"], m["pct"]
+        # Single-letter scales only count right after a currency figure ("$5B").
+        if scale and len(scale) == 1 and not cur:
+            scale = None
+        if not (cur or scale or pct) and YEAR_RE.fullmatch(num):
+            continue
+        try:
+            value = Decimal(num.replace(",", ""))
+        except InvalidOperation:
+            continue
+        factor = SCALES[scale.lower().rstrip("s")] if scale else Decimal(1)
+        decimals = len(num.split(".")[1]) if "." in num else 0
+        neg = m["neg"] and (m["neg"] != "(" or text[end - 1:end] == ")")
+        amounts.append(Amount(
+            value=(-value if neg else value) * factor,
+            unit="%" if pct else ("USD" if cur else ""),
+            raw=m.group().strip(),
+            start=start,
+            end=end,
+            scaled=bool(scale),
+            precision=Decimal(5) * Decimal(10) ** (-decimals - 1) * factor,
+        ))
+    return amounts
+
+
+# ─── Consistency ─────────────────────────────────────────────────────────────
+def _derive(target: Amount, operands: list[Amount]) -> str:
+    """Describe a one-step derivation of ``target`` from two snippet figures, if any."""
+    for a, b in itertools.permutations(operands[:MAX_DERIVATION_OPERANDS], 2):
+        candidates = []
+        if target.unit == "%":
+            if b.value:
+                candidates.append((a.value / b.value * 100, f"{a.raw} / {b.raw}"))
+                candidates.append(((a.value - b.value) / b.value * 100, f"({a.raw} - {b.raw}) / {b.raw}"))
+        elif a.unit != "%" and b.unit != "%":
+            candidates.append((a.value + b.value, f"{a.raw} + {b.raw}"))
+            candidates.append((a.value - b.value, f"{a.raw} - {b.raw}"))
+        for value, desc in candidates:
+            # Exact, so only the target's own rounding is allowed for.
+            derived = Amount(
+                value, target.unit or a.unit, desc, 0, 0, scaled=a.scaled and b.scaled, precision=Decimal(0),
+            )
+            if target.matches(derived):
+                return desc
+    return ""
+
+
+def check_answer(snippet: str, question: str, final_answer: str) -> FactCheck:
+    answer_amounts = extract_amounts(final_answer)
+    if not answer_amounts:
+        return FactCheck("no_number")
+    snippet_amounts = extract_amounts(snippet)
+    check = FactCheck("ok")
+    for amount in answer_amounts:
+        if not (amount.unit or amount.scaled):
+            check.issues.append(f"'{amount.raw}' has no units ($, %, millions, ...)")
+        if any(amount.matches(s) for s in snippet_amounts):
+            continue
+        derivation = _derive(amount, snippet_amounts)
+        status = "derived" if derivation else "not_found"
+        if STATUS_ORDER.index(status) > STATUS_ORDER.index(check.status):
+            check.status = status
+        if derivation:
+            check.derivation = check.derivation or derivation
+        else:
+            check.issues.append(f"'{amount.raw}' does not appear in and can't be derived from the snippet")
+
+    snippet_periods = {p.key for p in extract_periods(snippet)}
+    for period in extract_periods(question + "\n" + final_answer):
+        if snippet_periods and period.key not in snippet_periods:
+            check.issues.append(f"period '{period.raw}' is not in the snippet")
+    return check
+
+
+def check_record(record: dict) -> FactCheck:
+    return check_answer(record.get("snippet", ""), record.get("question", ""), record.get("final_answer", ""))
+
+
+def check_batch(records: Iterable[dict]) -> Iterator[tuple[dict, FactCheck]]:
+    for record in records:
+        yield record, check_record(record)
+
+
+def main() -> None:
+    from store import DEFAULT_DB_PATH, connect
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    parser.add_argument("--chunk", type=int, default=5000)
+    parser.add_argument("--failures", action="store_true", help="print each failing record")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    statuses: Counter = Counter()
+    started, last_id, n = time.perf_counter(), 0, 0
+    while True:
+        rows = conn.execute(
+            "SELECT id, payload FROM submissions WHERE id > ? ORDER BY id LIMIT ?", (last_id, args.chunk)
+        ).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        for record, check in check_batch(json.loads(p) for _, p in rows):
+            n += 1
+            statuses["passed" if check.passed else check.status] += 1
+            if args.failures and not check.passed:
+                print(json.dumps({"record_id": record.get("record_id"), **check.to_dict()}))
+    elapsed = time.perf_counter() - started
+    print(f"checked {n} records in {elapsed:.2f}s ({n / elapsed if elapsed else 0:.0f}/s): {dict(statuses)}")
+
+
+if __name__ == "__main__":
+    main()
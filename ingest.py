@@ -0,0 +1,313 @@
+"""Offline ingestion of raw EDGAR 10-K / 10-Q filings into the corpus.
+
+Filings are read from a local directory (``<raw>/<TICKER>/*.htm|html|txt``),
+parsed incrementally in fixed-size chunks, split into pages and named
+sections, and written to the ``DocumentStore`` plus a per-filing
+``FilingLayout``. Files are parsed in a process pool; only the parent process
+appends to the corpus manifest. The search index is rebuilt at the end.
+
+    python ingest.py path/to/raw --workers 8
+"""
+import argparse
+import os
+import re
+import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from html.parser import HTMLParser
+from pathlib import Path
+
+from corpus import DEFAULT_CORPUS_DIR, FORMS, Corpus, Filing, make_filing_id
+from docstore import DEFAULT_DOCS_DIR, DocumentStore
+from layout import FilingLayout, Section
+from search import DEFAULT_INDEX_DIR, build_index
+
+CHUNK_SIZE = 1 << 16
+SUFFIXES = {".htm", ".html", ".txt"}
+
+BLOCK_TAGS = {
+    "p", "div", "br", "tr", "li", "table", "title",
+    "h1", "h2", "h3", "h4", "h5", "h6",
+}
+CELL_TAGS = {"td", "th"}
+SKIP_TAGS = {"script", "style", "head", "ix:header", "sec-header"}
+
+PAGE_BREAK_RE = re.compile(r"page-break-(?:before|after)\s*:\s*always", re.I)
+WS_RE = re.compile(r"[ \t\r\xa0]+")
+# Printed page number at the foot of a page: "23", "Page 23", "Apple Inc. | 2024 Form 10-K | 23".
+PAGE_LABEL_RE = re.compile(r"^(?:.*\|\s*)?(?:page\s+)?(\d{1,4}|[ivxlc]{1,6})$", re.I)
+SECTION_RE = re.compile(
+    r"""^(?:
+        item\s+\d{1,2}[a-c]?\s*[.:\-–—]\s*[a-z].{0,100}
+      | (?:condensed\s+)?consolidated\s+(?:statements?\s+of|balance\s+sheets?)[a-z\s,'’()]{0,80}
+      | management[’']s\s+discussion\s+and\s+analysis.{0,80}
+      | notes\s+to\s+(?:condensed\s+)?consolidated\s+financial\s+statements.{0,20}
+      | report\s+of\s+independent\s+registered\s+public\s+accounting\s+firm
+    )$""",
+    re.I | re.X,
+)
+# Table-of-contents rows end with a page number; the real heading does not.
+TOC_ROW_RE = re.compile(r"\d+\s*$")
+
+SEC_HEADER_FIELDS = {
+    "CONFORMED SUBMISSION TYPE": "form",
+    "CONFORMED PERIOD OF REPORT": "period",
+    "FILED AS OF DATE": "filed",
+    "COMPANY CONFORMED NAME": "company",
+}
+SEC_HEADER_RE = re.compile(r"^\s*(" + "|".join(SEC_HEADER_FIELDS) + r"):\s*(.+?)\s*$", re.M)
+DEI_FIELDS = {
+    "dei:documenttype": "form",
+    "dei:documentperiodenddate": "period",
+    "dei:entityregistrantname": "company",
+    "dei:tradingsymbol": "ticker",
+}
+
+
+def parse_date(value: str) -> str:
+    """EDGAR header (20240928) or iXBRL ("September 28, 2024") date to ISO."""
+    value = WS_RE.sub(" ", value).strip()
+    for fmt in ("%Y%m%d", "%B %d, %Y", "%b %d, %Y", "%Y-%m-%d", "%m/%d/%Y"):
+        try:
+            return datetime.strptime(value, fmt).date().isoformat()
+        except ValueError:
+            pass
+    return value
+
+
+class FilingParser(HTMLParser):
+    """Incremental EDGAR parser; call ``feed()`` per chunk then ``close()``."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.meta: dict[str, str] = {}
+        self.layout = FilingLayout(array("I", [0]), [], [])
+        self._out: list[str] = []
+        self._pos = 0
+        self._line: list[str] = []
+        self._page_lines: list[str] = []  # last few lines of the current page
+        self._skip = 0
+        self._html = 0
+        self._capture: str | None = None  # meta key the next data belongs to
+        # Full-submission .txt files hold several <DOCUMENT>s; keep the main one.
+        self._in_document = False
+        self._in_text = False  # <TYPE>, <SEQUENCE> etc. precede a document's <TEXT>
+        self._doc_done = False
+        self._drop_document = False
+
+    @property
+    def text(self) -> str:
+        return "".join(self._out)
+
+    # ─── HTMLParser hooks ───────────────────────────────────────────────────
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "ix:nonnumeric":
+            self._capture = DEI_FIELDS.get((attrs.get("name") or "").lower())
+        elif tag == "type" and self._in_document:
+            self._capture = "doc_type"
+        elif tag == "document":
+            self._in_document = True
+            self._drop_document = self._doc_done
+        elif tag == "text":
+            self._in_text = True
+        elif tag == "page":
+            self._page_break()
+        if tag == "html":
+            self._html += 1
+        if tag in SKIP_TAGS:
+            self._skip += 1
+        if self._dropping():
+            return
+        if PAGE_BREAK_RE.search(attrs.get("style") or ""):
+            self._page_break()
+        elif tag in BLOCK_TAGS:
+            self._newline()
+        elif tag in CELL_TAGS and self._line:
+            self._line.append(" | ")
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self._skip = max(self._skip - 1, 0)
+        if tag == "html":
+            self._html = max(self._html - 1, 0)
+        if tag == "ix:nonnumeric":
+            self._capture = None
+        if tag == "text":
+            self._in_text = False
+        elif tag == "document":
+            self._newline()
+            self._in_document = False
+            self._doc_done = self._doc_done or not self._drop_document
+        elif tag in BLOCK_TAGS and not self._dropping():
+            self._newline()
+
+    def handle_data(self, data):
+        if self._capture:
+            self._capture_meta(data)
+        if not self._in_document and not self._doc_done and "CONFORMED" in data:
+            for key, value in SEC_HEADER_RE.findall(data):
+                self.meta.setdefault(SEC_HEADER_FIELDS[key], value)
+        if self._dropping():
+            return
+        if self._html:
+            self._line.append(data.replace("\n", " "))
+            return
+        # Plain-text filings keep their own line structure and \f page breaks.
+        for i, page in enumerate(data.split("\f")):
+            if i:
+                self._page_break()
+            lines = page.split("\n")
+            for j, line in enumerate(lines):
+                self._line.append(line)
+                if j < len(lines) - 1:
+                    self._newline()
+
+    def close(self):
+        super().close()
+        self._newline()
+        self._finish_page()
+
+    # ─── Output ─────────────────────────────────────────────────────────────
+    def _dropping(self) -> bool:
+        if self._in_document:
+            return self._skip > 0 or self._drop_document or not self._in_text
+        return self._skip > 0 or self._doc_done
+
+    def _capture_meta(self, data: str) -> None:
+        value = data.strip()
+        if not value:
+            return
+        if self._capture == "doc_type":
+            doc_type = value.split()[0].upper()
+            self.meta.setdefault("form", doc_type)
+            self._drop_document = self._doc_done or doc_type not in FORMS
+        else:
+            self.meta.setdefault(self._capture, value)
+        self._capture = None
+
+    def _newline(self) -> None:
+        line = WS_RE.sub(" ", "".join(self._line)).strip(" |")
+        self._line = []
+        if not line:
+            return
+        if len(line) <= 140 and SECTION_RE.match(line) and not TOC_ROW_RE.search(line):
+            self.layout.sections.append(Section(self._pos, len(self.layout.page_labels), line))
+        self._page_lines = (self._page_lines + [line])[-3:]
+        self._out.append(line + "\n")
+        self._pos += len(line) + 1
+
+    def _finish_page(self) -> None:
+        label = str(len(self.layout.page_labels) + 1)
+        for line in reversed(self._page_lines):
+            m = PAGE_LABEL_RE.match(line)
+            if m:
+                label = m.group(1)
+                break
+        self.layout.page_labels.append(label)
+        self._page_lines = []
+
+    def _page_break(self) -> None:
+        self._newline()
+        if self._pos == self.layout.page_offsets[-1]:
+            return  # consecutive breaks, nothing on this page yet
+        self._finish_page()
+        self.layout.page_offsets.append(self._pos)
+        self._out.append("\f")
+        self._pos += 1
+
+
+# ─── Per-file worker ─────────────────────────────────────────────────────────
+@dataclass
+class IngestResult:
+    path: str
+    filing: Filing | None = None
+    error: str = ""
+
+
+def parse_file(path: Path) -> FilingParser:
+    parser = FilingParser()
+    with open(path, encoding="utf-8", errors="replace") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            parser.feed(chunk)
+    parser.close()
+    return parser
+
+
+def ingest_file(path: Path, corpus_dir: Path, docs_dir: Path) -> IngestResult:
+    """Parse one filing and store its text and layout (runs in a worker process)."""
+    try:
+        parser = parse_file(path)
+    except (OSError, UnicodeError) as e:
+        return IngestResult(str(path), error=str(e))
+    meta = parser.meta
+    form = meta.get("form", "").upper()
+    if form not in FORMS:
+        return IngestResult(str(path), error=f"not a 10-K/10-Q (type {form or 'unknown'})")
+    if "period" not in meta:
+        return IngestResult(str(path), error="no period of report found")
+    ticker = (meta.get("ticker") or path.parent.name).upper()
+    period = parse_date(meta["period"])
+
+    corpus = Corpus(corpus_dir, DocumentStore(docs_dir))
+    sha = corpus.docstore.put(parser.text)
+    corpus.write_layout(sha, parser.layout)
+    filing = Filing(
+        filing_id=make_filing_id(ticker, form, period),
+        ticker=ticker,
+        company=WS_RE.sub(" ", meta.get("company", ticker)).strip(),
+        form=form,
+        period=period,
+        filed=parse_date(meta["filed"]) if "filed" in meta else "",
+        sha256=sha,
+    )
+    return IngestResult(str(path), filing=filing)
+
+
+def _ingest_star(args):
+    return ingest_file(*args)
+
+
+def ingest_dir(
+    raw_dir: Path, corpus: Corpus, docs_dir: Path = DEFAULT_DOCS_DIR, workers: int | None = None,
+) -> tuple[int, int]:
+    """Ingest every filing under ``raw_dir``; returns (ingested, skipped)."""
+    paths = sorted(p for p in raw_dir.rglob("*") if p.suffix.lower() in SUFFIXES and p.is_file())
+    ok = skipped = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        jobs = ((p, corpus.root, docs_dir) for p in paths)
+        for result in pool.map(_ingest_star, jobs, chunksize=4):
+            if result.filing is None:
+                skipped += 1
+                print(f"skip {result.path}: {result.error}", file=sys.stderr)
+            else:
+                ok += 1
+                corpus.register(result.filing)
+    return ok, skipped
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("raw_dir", type=Path)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS_DIR)
+    parser.add_argument("--docs", type=Path, default=DEFAULT_DOCS_DIR)
+    parser.add_argument("--index", type=Path, default=DEFAULT_INDEX_DIR)
+    parser.add_argument("--no-index", action="store_true", help="skip rebuilding the search index")
+    args = parser.parse_args()
+
+    corpus = Corpus(args.corpus, DocumentStore(args.docs))
+    ok, skipped = ingest_dir(args.raw_dir, corpus, args.docs, args.workers)
+    print(f"ingested {ok} filings ({skipped} skipped)")
+    if not args.no_index:
+        n = build_index(corpus, args.index)
+        print(f"indexed {n} filings into {args.index}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Page and section offset table for an ingested filing.
+
+A layout maps character offsets in the filing text to printed page labels
+and named sections. It is stored next to the corpus as a small binary file:
+
+    magic "DAL1" | n_pages u32 | n_sections u32
+    page_offsets u32[n_pages] | section_offsets u32[n_sections] | section_pages u32[n_sections]
+    UTF-8 labels: page labels then section names, newline-separated
+"""
+import struct
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass, field
+
+MAGIC = b"DAL1"
+HEADER = struct.Struct("<4sII")
+
+
+@dataclass(frozen=True)
+class Section:
+    offset: int
+    page: int  # index into FilingLayout.page_offsets
+    name: str
+
+
+@dataclass
+class FilingLayout:
+    page_offsets: array = field(default_factory=lambda: array("I", [0]))
+    page_labels: list[str] = field(default_factory=lambda: ["1"])
+    sections: list[Section] = field(default_factory=list)
+
+    @property
+    def n_pages(self) -> int:
+        return len(self.page_offsets)
+
+    def page_at(self, offset: int) -> int:
+        """Index of the page containing character ``offset``."""
+        return max(bisect_right(self.page_offsets, offset) - 1, 0)
+
+    def page_span(self, page: int, text_len: int) -> tuple[int, int]:
+        start = self.page_offsets[page]
+        end = self.page_offsets[page + 1] if page + 1 < self.n_pages else text_len
+        return start, end
+
+    def page_index(self, label: str) -> int | None:
+        """Page index for a printed page label such as ``"23"``."""
+        label = label.strip()
+        for i, lab in enumerate(self.page_labels):
+            if lab == label:
+                return i
+        return None
+
+    def section_at(self, offset: int) -> Section | None:
+        i = bisect_right([s.offset for s in self.sections], offset) - 1
+        return self.sections[i] if i >= 0 else None
+
+    # ─── Serialization ──────────────────────────────────────────────────────
+    def to_bytes(self) -> bytes:
+        n_sections = len(self.sections)
+        labels = "\n".join(self.page_labels + [s.name for s in self.sections]).encode("utf-8")
+        return b"".join([
+            HEADER.pack(MAGIC, self.n_pages, n_sections),
+            self.page_offsets.tobytes(),
+            array("I", [s.offset for s in self.sections]).tobytes(),
+            array("I", [s.page for s in self.sections]).tobytes(),
+            labels,
+        ])
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "FilingLayout":
+        magic, n_pages, n_sections = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("not a filing layout file")
+        pos = HEADER.size
+        page_offsets = array("I")
+        page_offsets.frombytes(data[pos:pos + 4 * n_pages])
+        pos += 4 * n_pages
+        sec_offsets = array("I")
+        sec_offsets.frombytes(data[pos:pos + 4 * n_sections])
+        pos += 4 * n_sections
+        sec_pages = array("I")
+        sec_pages.frombytes(data[pos:pos + 4 * n_sections])
+        pos += 4 * n_sections
+        labels = data[pos:].decode("utf-8").split("\n")
+        sections = [Section(o, p, n) for o, p, n in zip(sec_offsets, sec_pages, labels[n_pages:])]
+        return cls(page_offsets, labels[:n_pages], sections)
@@ -0,0 +1,153 @@
+"""Detection of personally identifiable information in task text.
+
+Emails, phone numbers, US Social Security numbers, street addresses and
+personal names (after an honorific, "my name is" or a "Name:" label) are
+matched by one compiled regex with a named group per kind, so each field is
+scanned in a single pass. Results are cached per field text: Streamlit reruns
+the script on every keystroke, but usually only one field has changed.
+
+``scan_batch`` runs the same scan over an iterable of records, and the CLI
+rescans the whole stored dataset:
+
+    python pii.py --db data/submissions.db --findings
+"""
+import argparse
+import json
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Iterable, Iterator
+
+FIELDS = ("question", "reasoning", "final_answer", "snippet")
+SCAN_CACHE_SIZE = 1024
+
+KINDS = {
+    "email": "an email address",
+    "phone": "a phone number",
+    "ssn": "a Social Security number",
+    "address": "a street address",
+    "name": "a personal name",
+}
+_NAME = r"[A-Z][a-z]+(?:[-'][A-Z][a-z]+)?"
+STREET_SUFFIXES = (
+    "street|st|avenue|ave|road|rd|boulevard|blvd|lane|ln|drive|dr|court|ct|place|pl"
+    "|terrace|ter|circle|cir|parkway|pkwy|highway|hwy|way"
+)
+
+# Every kind starts at a word start; checking that once up front lets most
+# positions fail before any alternative is tried.
+PII_RE = re.compile(
+    rf"""(?<!\w)
+    (?: (?P<email>\b[\w.%+-]+@[\w-]+(?:\.[\w-]+)*\.[A-Za-z]{{2,}}\b)
+      | (?P<ssn>(?<![\d-])(?!000|666|9\d\d)\d{{3}}-(?!00)\d{{2}}-(?!0000)\d{{4}}(?![\d-]))
+      | (?P<phone>(?<![\w$.,-])(?:\+?1[\s.-]?)?(?:\(\d{{3}}\)\s?|\d{{3}}[\s.-])\d{{3}}[\s.-]\d{{4}}(?![\d-]))
+      | (?P<address>\b\d{{1,6}}\s+(?:{_NAME}\s+){{1,4}}(?i:{STREET_SUFFIXES})\b\.?
+          | (?i:\bp\.?\s?o\.?\s+box\s+\d+))
+      | (?P<name>\b(?:Mr|Mrs|Ms|Miss|Mx|Dr|Prof)\.?\s+{_NAME}(?:\s+[A-Z]\.)?(?:\s+{_NAME})?
+          | (?i:\bmy\s+name\s+is\s+)(?-i:{_NAME}(?:\s+{_NAME})?)
+          | (?i:\b(?:full\s+)?name\s*:\s*)(?-i:{_NAME}\s+{_NAME})))""",
+    re.X,
+)
+
+
+@dataclass(frozen=True)
+class PiiMatch:
+    kind: str
+    field: str
+    text: str
+    start: int
+    end: int
+
+    @property
+    def masked(self) -> str:
+        """The match with all but its first and last characters starred out."""
+        if len(self.text) <= 4:
+            return "*" * len(self.text)
+        return self.text[0] + "*" * (len(self.text) - 2) + self.text[-1]
+
+    def to_dict(self) -> dict:
+        return {"kind": self.kind, "field": self.field, "start": self.start, "end": self.end}
+
+
+@dataclass
+class PiiScan:
+    matches: list[PiiMatch] = field(default_factory=list)
+
+    @property
+    def passed(self) -> bool:
+        return not self.matches
+
+    @property
+    def issues(self) -> list[str]:
+        return [
+            f"{m.field.replace('_', ' ')} looks like it contains {KINDS[m.kind]} ('{m.masked}')"
+            for m in self.matches
+        ]
+
+    def to_dict(self) -> dict:
+        # Only offsets are stored: a copy of the PII would defeat the check.
+        return {"matches": [m.to_dict() for m in self.matches]}
+
+
+@lru_cache(maxsize=SCAN_CACHE_SIZE)
+def _scan(text: str) -> tuple[tuple[str, str, int, int], ...]:
+    return tuple((m.lastgroup, m.group(), m.start(), m.end()) for m in PII_RE.finditer(text))
+
+
+def scan_text(text: str, field_name: str = "") -> list[PiiMatch]:
+    return [PiiMatch(kind, field_name, found, start, end) for kind, found, start, end in _scan(text)]
+
+
+def scan_fields(fields: dict[str, str]) -> PiiScan:
+    return PiiScan([m for name, text in fields.items() if text for m in scan_text(text, name)])
+
+
+def scan_record(record: dict) -> PiiScan:
+    return scan_fields({f: record.get(f) or "" for f in FIELDS})
+
+
+def scan_batch(records: Iterable[dict]) -> Iterator[tuple[dict, PiiScan]]:
+    # Stored records rarely repeat, so bypass the cache rather than churn it.
+    for record in records:
+        yield record, PiiScan([
+            PiiMatch(m.lastgroup, f, m.group(), m.start(), m.end())
+            for f in FIELDS
+            for m in PII_RE.finditer(record.get(f) or "")
+        ])
+
+
+def main() -> None:
+    from store import DEFAULT_DB_PATH, connect
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    parser.add_argument("--chunk", type=int, default=5000)
+    parser.add_argument("--findings", action="store_true", help="print each record with PII findings")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    kinds: Counter = Counter()
+    started, last_id, n, flagged = time.perf_counter(), 0, 0, 0
+    while True:
+        rows = conn.execute(
+            "SELECT id, payload FROM submissions WHERE id > ? ORDER BY id LIMIT ?", (last_id, args.chunk)
+        ).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        for record, scan in scan_batch(json.loads(p) for _, p in rows):
+            n += 1
+            if scan.passed:
+                continue
+            flagged += 1
+            kinds.update(m.kind for m in scan.matches)
+            if args.findings:
+                print(json.dumps({"record_id": record.get("record_id"), "issues": scan.issues}))
+    elapsed = time.perf_counter() - started
+    print(f"scanned {n} records in {elapsed:.2f}s ({n / elapsed if elapsed else 0:.0f}/s): {flagged} flagged {dict(kinds)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""Verify that a pasted snippet really comes from the cited page of a filing.
+
+Each document is tokenized once into an array of token ids and a sorted
+token-trigram table (a suffix-array-style index over 3-grams). A snippet line
+is then located with a couple of binary searches. Matching works on tokens,
+so whitespace, ``|`` table separators, ``$`` placement and thousands
+separators do not affect it.
+"""
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Callable
+
+import numpy as np
+
+from docstore import DocumentStore
+from layout import FilingLayout
+
+INDEX_CACHE_SIZE = 64
+# A line counts as found (approximately) if this share of its trigrams line up.
+APPROX_MIN_SCORE = 0.6
+# ... and every figure in it occurs exactly within this many tokens past the
+# line's length from the matched start, so an edited number never verifies.
+APPROX_SLACK = 4
+_BASE = np.int64(1_000_003)
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:[.,][0-9]+)*")
+# Amounts, percentages and comma-grouped figures; bare years and page numbers
+# are usually the worker's own context line ("From the 2024 10-K, page 23").
+FACT_RE = re.compile(r"\$\s?\d|\d\s?%|\d{1,3}(?:,\d{3})+")
+
+
+def _norm(token: str) -> str:
+    return token.replace(",", "")
+
+
+class DocIndex:
+    def __init__(self, text: str):
+        vocab: dict[str, int] = {}
+        ids, offsets, ends = [], [], []
+        for m in TOKEN_RE.finditer(text.lower()):
+            ids.append(vocab.setdefault(_norm(m.group()), len(vocab)))
+            offsets.append(m.start())
+            ends.append(m.end())
+        self.vocab = vocab
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.ends = np.asarray(ends, dtype=np.int64)
+        keys = self._trigram_keys(self.ids)
+        self.order = np.argsort(keys, kind="stable")
+        self.keys = keys[self.order]
+
+    @staticmethod
+    def _trigram_keys(ids: np.ndarray) -> np.ndarray:
+        if len(ids) < 3:
+            return np.empty(0, dtype=np.int64)
+        return (ids[:-2] * _BASE + ids[1:-1]) * _BASE + ids[2:]
+
+    def encode(self, line: str) -> np.ndarray | None:
+        """Token ids for ``line``, or None if it has a token the document lacks."""
+        ids = [self.vocab.get(_norm(t)) for t in TOKEN_RE.findall(line.lower())]
+        if None in ids:
+            return None
+        return np.asarray(ids, dtype=np.int64)
+
+    def find_exact(self, ids: np.ndarray) -> np.ndarray:
+        """Token positions where the whole sequence ``ids`` occurs."""
+        m = len(ids)
+        if m >= 3:
+            (key,) = self._trigram_keys(ids[:3])
+            lo, hi = np.searchsorted(self.keys, [key, key + 1])
+            starts = self.order[lo:hi]
+        else:
+            starts = np.flatnonzero(self.ids == ids[0])
+        starts = starts[starts + m <= len(self.ids)]
+        if m == 1 or len(starts) == 0:
+            return starts
+        window = self.ids[starts[:, None] + np.arange(m)]
+        return starts[(window == ids).all(axis=1)]
+
+    def find_approx(self, line: str) -> tuple[int, float] | None:
+        """Best (start position, score) by voting over the line's known trigrams."""
+        ids = [self.vocab.get(_norm(t), -1) for t in TOKEN_RE.findall(line.lower())]
+        if len(ids) < 3:
+            return None
+        keys = self._trigram_keys(np.asarray(ids, dtype=np.int64))
+        votes = []
+        for j, key in enumerate(keys):
+            lo, hi = np.searchsorted(self.keys, [key, key + 1])
+            votes.append(self.order[lo:hi] - j)
+        votes = np.concatenate(votes)
+        if len(votes) == 0:
+            return None
+        starts, counts = np.unique(votes, return_counts=True)
+        best = counts.argmax()
+        return int(max(starts[best], 0)), counts[best] / len(keys)
+
+    def figures_at(self, line: str, start: int) -> bool:
+        """Whether every token with a digit in ``line`` occurs as-is near token ``start``."""
+        tokens = [_norm(t) for t in TOKEN_RE.findall(line.lower())]
+        window = set(self.ids[start:start + len(tokens) + APPROX_SLACK].tolist())
+        return all(self.vocab.get(t, -1) in window for t in tokens if any(c.isdigit() for c in t))
+
+
+@dataclass
+class LineMatch:
+    line: str
+    status: str  # "exact", "approx" or "missing"
+    page: int | None = None  # layout page index
+    section: str = ""
+    start: int | None = None  # character range of the match in the document
+    end: int | None = None
+
+    @property
+    def is_fact(self) -> bool:
+        """Lines with figures carry the facts; other lines may be worker context."""
+        return bool(FACT_RE.search(self.line))
+
+
+@dataclass
+class ProvenanceResult:
+    lines: list[LineMatch] = field(default_factory=list)
+    cited_page: str = ""
+    cited_section: str = ""
+    found_page: str = ""  # printed label of the page most fact lines were found on
+    found_section: str = ""
+    # Character range in the document spanned by the lines found on found_page.
+    found_start: int | None = None
+    found_end: int | None = None
+
+    @property
+    def missing(self) -> list[LineMatch]:
+        return [m for m in self.lines if m.status == "missing" and m.is_fact]
+
+    @property
+    def verified(self) -> bool:
+        return any(m.status != "missing" for m in self.lines) and not self.missing
+
+    @property
+    def page_confirmed(self) -> bool:
+        return self.verified and self.found_page == self.cited_page
+
+    @property
+    def section_confirmed(self) -> bool:
+        cited, found = self.cited_section.lower(), self.found_section.lower()
+        return bool(cited and found) and (cited in found or found in cited)
+
+    def to_dict(self) -> dict:
+        return {
+            "verified": self.verified,
+            "lines_found": sum(m.status != "missing" for m in self.lines),
+            "lines_total": len(self.lines),
+            "cited_page": self.cited_page,
+            "found_page": self.found_page,
+            "found_section": self.found_section,
+            "found_start": self.found_start,
+            "found_end": self.found_end,
+            "section_confirmed": self.section_confirmed,
+        }
+
+
+class ProvenanceVerifier:
+    def __init__(self, docstore: DocumentStore, layout_for: Callable[[str], FilingLayout]):
+        self.docstore = docstore
+        self.layout_for = layout_for
+        self.index = lru_cache(maxsize=INDEX_CACHE_SIZE)(self._build_index)
+
+    def _build_index(self, sha: str) -> DocIndex:
+        return DocIndex(self.docstore.get(sha))
+
+    def verify(self, sha: str, snippet: str, cited_page: str = "", cited_section: str = "") -> ProvenanceResult:
+        index = self.index(sha)
+        layout = self.layout_for(sha)
+        cited = layout.page_index(cited_page) if cited_page else None
+        page_offsets = np.asarray(layout.page_offsets, dtype=np.int64)
+        result = ProvenanceResult(cited_page=cited_page.strip(), cited_section=cited_section.strip())
+
+        for line in (ln.strip() for ln in snippet.splitlines()):
+            if not TOKEN_RE.search(line.lower()):
+                continue
+            match = LineMatch(line, "missing")
+            ids = index.encode(line)
+            positions = index.find_exact(ids) if ids is not None and len(ids) else np.empty(0, dtype=np.int64)
+            if len(positions):
+                match.status = "exact"
+            else:
+                approx = index.find_approx(line)
+                if approx and approx[1] >= APPROX_MIN_SCORE and index.figures_at(line, approx[0]):
+                    match.status = "approx"
+                    positions = np.asarray([approx[0]])
+            if len(positions):
+                pages = np.searchsorted(page_offsets, index.offsets[positions], side="right") - 1
+                # Prefer the occurrence on the cited page when there are several.
+                on_cited = np.flatnonzero(pages == cited) if cited is not None else []
+                i = int(on_cited[0]) if len(on_cited) else 0
+                match.page = int(pages[i])
+                n_tokens = len(TOKEN_RE.findall(line.lower()))
+                last = min(int(positions[i]) + n_tokens, len(index.ids)) - 1
+                match.start, match.end = int(index.offsets[positions[i]]), int(index.ends[last])
+                section = layout.section_at(match.start)
+                match.section = section.name if section else ""
+            result.lines.append(match)
+
+        found = [m for m in result.lines if m.page is not None]
+        fact_found = [m for m in found if m.is_fact] or found
+        if fact_found:
+            page = Counter(m.page for m in fact_found).most_common(1)[0][0]
+            result.found_page = layout.page_labels[page]
+            result.found_section = next((m.section for m in fact_found if m.page == page), "")
+            result.found_start = min(m.start for m in found if m.page == page)
+            result.found_end = max(m.end for m in found if m.page == page)
+        return result
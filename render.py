@@ -0,0 +1,68 @@
+"""Per-page highlighted HTML for the doc-viewer.
+
+Each (document hash, page) is highlighted once and kept in an LRU cache, so
+reruns only join the few cached pages that are on screen.
+"""
+import html
+import re
+from functools import lru_cache
+from typing import Callable
+
+from docstore import DocumentStore
+from layout import FilingLayout
+
+PAGE_CACHE_SIZE = 512
+LAYOUT_CACHE_SIZE = 64
+
+HIGHLIGHT_RE = re.compile(
+    r"""(?P<period>
+        \b(?i:(?:three|six|nine|twelve)\s+months|(?:fiscal\s+)?years?|quarters?)\s+(?i:ended)\s+[A-Z][a-z]+\.?\s+\d{1,2},\s+\d{4}
+      | \b(?i:as\s+of)\s+[A-Z][a-z]+\.?\s+\d{1,2},\s+\d{4}
+    )
+    | (?P<num>
+        \(?\$\s?\d[\d,]*(?:\.\d+)?\)?(?:\s(?:thousand|million|billion)s?)?
+      | \b\d[\d,]*(?:\.\d+)?\s?%
+      | \b\d{1,3}(?:,\d{3})+(?:\.\d+)?\b
+    )""",
+    re.X,
+)
+CLASSES = {"period": "doc-period", "num": "doc-num"}
+
+
+def _highlight_line(line: str) -> str:
+    out, last = [], 0
+    for m in HIGHLIGHT_RE.finditer(line):
+        out.append(html.escape(line[last:m.start()]))
+        out.append(f'<span class="{CLASSES[m.lastgroup]}">{html.escape(m.group())}</span>')
+        last = m.end()
+    out.append(html.escape(line[last:]))
+    return "".join(out)
+
+
+class PageRenderer:
+    def __init__(self, docstore: DocumentStore, layout_for: Callable[[str], FilingLayout]):
+        self.docstore = docstore
+        self.layout = lru_cache(maxsize=LAYOUT_CACHE_SIZE)(layout_for)
+        self.page = lru_cache(maxsize=PAGE_CACHE_SIZE)(self._render_page)
+
+    def _render_page(self, sha: str, page: int) -> str:
+        text = self.docstore.get(sha)
+        layout = self.layout(sha)
+        start, end = layout.page_span(page, len(text))
+        if text.startswith("\f", start):
+            start += 1
+        headings = {s.offset for s in layout.sections if start <= s.offset < end}
+        lines, pos = [], start
+        for line in text[start:end].split("\n"):
+            if pos in headings:
+                lines.append(f'<span class="doc-section">{html.escape(line)}</span>')
+            else:
+                lines.append(_highlight_line(line))
+            pos += len(line) + 1
+        return "\n".join(lines).rstrip("\n")
+
+    def window(self, sha: str, first: int, count: int) -> str:
+        """HTML for pages ``first .. first + count - 1`` (clamped to the document)."""
+        n_pages = self.layout(sha).n_pages
+        pages = range(max(first, 0), min(first + count, n_pages))
+        return '\n<hr class="doc-page-break">\n'.join(self.page(sha, p) for p in pages)
@@ -0,0 +1,108 @@
+"""Per-worker ticker and section reuse index.
+
+Backs the "do not reuse the same ticker / section" rules. Rows live in the
+submission database under primary keys (worker, ticker) and
+(worker, filing, section) and are written with ``INSERT OR IGNORE``, so
+concurrent writers from any number of app processes can't create duplicates.
+Lookups are served from a per-worker in-process cache that is refreshed from
+SQLite after ``CACHE_TTL_S`` and updated directly on local writes.
+"""
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+
+from store import SubmissionStore
+
+CACHE_TTL_S = 30.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS worker_tickers (
+    worker_id TEXT NOT NULL,
+    ticker    TEXT NOT NULL,
+    record_id TEXT NOT NULL,
+    PRIMARY KEY (worker_id, ticker)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS worker_sections (
+    worker_id TEXT NOT NULL,
+    filing_id TEXT NOT NULL,
+    section   TEXT NOT NULL,
+    record_id TEXT NOT NULL,
+    PRIMARY KEY (worker_id, filing_id, section)
+) WITHOUT ROWID;
+"""
+
+_SECTION_NOISE_RE = re.compile(r"\((?:unaudited|page\s+\d+|continued)\)|[^a-z0-9 ]", re.I)
+_WS_RE = re.compile(r"\s+")
+
+
+def section_key(name: str) -> str:
+    """Normalize a section name so "Statements of Operations (Unaudited)" == "statements of operations"."""
+    return _WS_RE.sub(" ", _SECTION_NOISE_RE.sub(" ", name.lower())).strip()
+
+
+@dataclass
+class _WorkerUsage:
+    loaded_at: float
+    tickers: set[str] = field(default_factory=set)
+    sections: set[tuple[str, str]] = field(default_factory=set)
+
+
+class ReuseIndex:
+    def __init__(self, store: SubmissionStore):
+        self.store = store
+        store.ensure_schema(SCHEMA)
+        self._lock = threading.Lock()
+        self._cache: dict[str, _WorkerUsage] = {}
+
+    def _usage(self, worker_id: str) -> _WorkerUsage:
+        with self._lock:
+            usage = self._cache.get(worker_id)
+        if usage is not None and time.monotonic() - usage.loaded_at < CACHE_TTL_S:
+            return usage
+        fresh = _WorkerUsage(
+            time.monotonic(),
+            {t for (t,) in self.store.query("SELECT ticker FROM worker_tickers WHERE worker_id = ?", (worker_id,))},
+            set(self.store.query("SELECT filing_id, section FROM worker_sections WHERE worker_id = ?", (worker_id,))),
+        )
+        with self._lock:
+            # Keep local writes that are still queued in the store.
+            if usage is not None:
+                fresh.tickers |= usage.tickers
+                fresh.sections |= usage.sections
+            self._cache[worker_id] = fresh
+        return fresh
+
+    def ticker_used(self, worker_id: str, ticker: str) -> bool:
+        return ticker.strip().upper() in self._usage(worker_id).tickers
+
+    def section_used(self, worker_id: str, filing_id: str, section: str) -> bool:
+        return (filing_id, section_key(section)) in self._usage(worker_id).sections
+
+    def used(self, worker_id: str) -> tuple[set[str], set[tuple[str, str]]]:
+        """Copies of the worker's used tickers and (filing, section key) pairs."""
+        usage = self._usage(worker_id)
+        with self._lock:
+            return set(usage.tickers), set(usage.sections)
+
+    def add(self, record: dict) -> None:
+        """Record the tickers and sections of every document a submission cites."""
+        worker_id, record_id = record["worker_id"], record["record_id"]
+        used = []
+        for doc in record["documents"]:
+            # The section the snippet was found in, falling back to the cited one.
+            section = (doc.get("provenance") or {}).get("found_section") or doc["section_name"]
+            used.append((doc["ticker"].upper(), doc["filing_id"], section_key(section)))
+        for ticker, filing_id, key in used:
+            self.store.execute_async(
+                "INSERT OR IGNORE INTO worker_tickers (worker_id, ticker, record_id) VALUES (?, ?, ?)",
+                (worker_id, ticker, record_id),
+            )
+            self.store.execute_async(
+                "INSERT OR IGNORE INTO worker_sections (worker_id, filing_id, section, record_id) VALUES (?, ?, ?, ?)",
+                (worker_id, filing_id, key, record_id),
+            )
+        usage = self._usage(worker_id)
+        with self._lock:
+            usage.tickers.update(t for t, _, _ in used)
+            usage.sections.update((f, k) for _, f, k in used)
@@ -0,0 +1,265 @@
+"""Review queue over the submission backlog.
+
+Reviewers page through submissions with filters, a sort order and full-text
+search, and approve or reject them. Every query runs against an index: the
+column indexes on ``submissions``, a ``reviews`` table keyed by submission id,
+and a contentless FTS5 index over question, snippet and final answer that a
+trigger fills inside the store's own commits. Pages are fetched with keyset
+cursors and only the columns the table shows are pulled out of the payload,
+so page cost doesn't grow with the backlog.
+
+Aggregate counts are cached until a submission or review is inserted,
+replaced or deleted (from any process): ``PRAGMA data_version`` tells when
+anything was committed, and a trigger-maintained change counter tells whether
+it touched reviews or removed submissions. New submissions alone are counted
+incrementally. Decisions are queued on the store and committed in one batch.
+The example in ``ReviewQueue.counts`` runs with ``python -m doctest review.py``.
+"""
+import json
+import re
+import threading
+from dataclasses import dataclass, field
+
+from store import SubmissionStore
+
+PAGE_SIZE = 50
+STATUSES = ("pending", "approved", "rejected")
+SORTS = ("newest", "oldest", "ticker")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reviews (
+    submission_id INTEGER NOT NULL UNIQUE,
+    status        TEXT NOT NULL,
+    reviewer      TEXT NOT NULL,
+    note          TEXT NOT NULL DEFAULT '',
+    reviewed_at   TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_reviews_status ON reviews (status, submission_id);
+-- Bumped by every change except a plain submission insert. Only moves forward,
+-- unlike max(rowid), which SQLite hands out again after a delete.
+CREATE TABLE IF NOT EXISTS review_changes (id INTEGER PRIMARY KEY CHECK (id = 1), n INTEGER NOT NULL);
+INSERT OR IGNORE INTO review_changes (id, n) VALUES (1, 0);
+CREATE TRIGGER IF NOT EXISTS tr_reviews_insert AFTER INSERT ON reviews BEGIN
+    UPDATE review_changes SET n = n + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS tr_reviews_update AFTER UPDATE ON reviews BEGIN
+    UPDATE review_changes SET n = n + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS tr_reviews_delete AFTER DELETE ON reviews BEGIN
+    UPDATE review_changes SET n = n + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS tr_submissions_update AFTER UPDATE ON submissions BEGIN
+    UPDATE review_changes SET n = n + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS tr_submissions_delete AFTER DELETE ON submissions BEGIN
+    UPDATE review_changes SET n = n + 1;
+END;
+CREATE VIRTUAL TABLE IF NOT EXISTS submissions_fts USING fts5(question, snippet, final_answer, content='');
+CREATE TRIGGER IF NOT EXISTS tr_submissions_fts AFTER INSERT ON submissions BEGIN
+    INSERT INTO submissions_fts (rowid, question, snippet, final_answer) VALUES (
+        new.id,
+        json_extract(new.payload, '$.question'),
+        json_extract(new.payload, '$.snippet'),
+        json_extract(new.payload, '$.final_answer')
+    );
+END;
+-- Rows stored before the trigger existed.
+INSERT INTO submissions_fts (rowid, question, snippet, final_answer)
+SELECT id, json_extract(payload, '$.question'), json_extract(payload, '$.snippet'), json_extract(payload, '$.final_answer')
+FROM submissions WHERE id > (SELECT coalesce(max(rowid), 0) FROM submissions_fts);
+"""
+
+PAGE_COLUMNS = """
+    s.id, s.category, s.ticker, s.worker_id, s.ts,
+    json_extract(s.payload, '$.question'),
+    json_extract(s.payload, '$.final_answer'),
+    coalesce(json_array_length(s.payload, '$.duplicates'), 0),
+    coalesce(json_array_length(s.payload, '$.fact_check.issues'), 0)
+        + coalesce(json_array_length(s.payload, '$.calc_audit.issues'), 0),
+    coalesce(r.status, 'pending')
+"""
+_FTS_TOKEN_RE = re.compile(r"[\w$%.,-]+")
+
+
+def fts_query(text: str) -> str:
+    """Quote each term so user input can't use (or break) FTS5 query syntax."""
+    return " ".join('"' + t.replace('"', '""') + '"' for t in _FTS_TOKEN_RE.findall(text))
+
+
+@dataclass
+class ReviewFilter:
+    status: str | None = "pending"
+    categories: list[str] = field(default_factory=list)
+    ticker: str = ""
+    worker_id: str = ""
+    search: str = ""
+
+    def where(self) -> tuple[list[str], list]:
+        clauses, params = [], []
+        if self.status == "pending":
+            clauses.append("r.status IS NULL")
+        elif self.status:
+            clauses.append("r.status = ?")
+            params.append(self.status)
+        if self.categories:
+            clauses.append(f"s.category IN ({','.join('?' * len(self.categories))})")
+            params += self.categories
+        if self.ticker.strip():
+            clauses.append("s.ticker = ?")
+            params.append(self.ticker.strip().upper())
+        if self.worker_id.strip():
+            clauses.append("s.worker_id = ?")
+            params.append(self.worker_id.strip())
+        query = fts_query(self.search)
+        if query:
+            clauses.append("s.id IN (SELECT rowid FROM submissions_fts WHERE submissions_fts MATCH ?)")
+            params.append(query)
+        return clauses, params
+
+
+@dataclass(frozen=True)
+class ReviewRow:
+    id: int
+    category: str
+    ticker: str
+    worker_id: str
+    timestamp: str
+    question: str
+    final_answer: str
+    duplicates: int
+    check_issues: int
+    status: str
+
+
+class ReviewQueue:
+    def __init__(self, store: SubmissionStore):
+        self.store = store
+        store.ensure_schema(SCHEMA)
+        self._lock = threading.Lock()
+        self._counts: dict[tuple[str, str], int] = {}
+        self._counts_version: tuple | None = None
+        self._data_version: int | None = None
+
+    def page(
+        self, flt: ReviewFilter, sort: str = "newest", after: tuple | None = None, limit: int = PAGE_SIZE,
+    ) -> tuple[list[ReviewRow], tuple | None]:
+        """One page of rows plus the cursor for the next page (None on the last page)."""
+        clauses, params = flt.where()
+        order = {"newest": "s.id DESC", "oldest": "s.id", "ticker": "s.ticker, s.id"}[sort]
+        if after is not None:
+            if sort == "newest":
+                clauses.append("s.id < ?")
+            elif sort == "oldest":
+                clauses.append("s.id > ?")
+            else:
+                clauses.append("(s.ticker, s.id) > (?, ?)")
+            params += list(after)
+        sql = (
+            f"SELECT {PAGE_COLUMNS} FROM submissions s LEFT JOIN reviews r ON r.submission_id = s.id"
+            + (" WHERE " + " AND ".join(clauses) if clauses else "")
+            + f" ORDER BY {order} LIMIT ?"
+        )
+        rows = [ReviewRow(*row) for row in self.store.query(sql, (*params, limit + 1))]
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        last = rows[-1]
+        return rows, (last.ticker, last.id) if sort == "ticker" else (last.id,)
+
+    def record(self, submission_id: int) -> dict | None:
+        rows = self.store.query("SELECT payload FROM submissions WHERE id = ?", (submission_id,))
+        return json.loads(rows[0][0]) if rows else None
+
+    def own_submissions(self, worker_id: str, submission_ids: list[int]) -> set[int]:
+        """The ids among ``submission_ids`` that ``worker_id`` submitted."""
+        rows = self.store.query(
+            f"SELECT id FROM submissions WHERE worker_id = ? AND id IN ({','.join('?' * len(submission_ids))})",
+            (worker_id, *submission_ids),
+        )
+        return {i for (i,) in rows}
+
+    def _version(self) -> tuple:
+        """(max submission id, change counter).
+
+        Plain submission inserts move only the max id; everything else that
+        affects the counts moves the counter.
+        """
+        return self.store.query(
+            "SELECT (SELECT max(id) FROM submissions), (SELECT n FROM review_changes)"
+        )[0]
+
+    def counts(self) -> dict[tuple[str, str], int]:
+        """(category, status) -> count, updated only after submissions or reviews change.
+
+        A batch that frees the largest review rowid and reuses it still counts:
+
+        >>> import tempfile
+        >>> from pathlib import Path
+        >>> store = SubmissionStore(Path(tempfile.mkdtemp()) / "submissions.db")
+        >>> for i in range(3):
+        ...     store.submit({"worker_id": "W", "category": "A", "ticker": "X", "timestamp": ""})
+        >>> queue = ReviewQueue(store)
+        >>> queue.decide({1: "approved", 2: "approved"}, "R")
+        >>> sorted(queue.counts().items())
+        [(('A', 'approved'), 2), (('A', 'pending'), 1)]
+        >>> queue.decide({2: "pending", 3: "rejected"}, "R")
+        >>> sorted(queue.counts().items())
+        [(('A', 'approved'), 1), (('A', 'pending'), 1), (('A', 'rejected'), 1)]
+        >>> store.close()
+        """
+        # Changes whenever another connection (the store's writer, another
+        # process) commits, so an idle database costs one pragma per call.
+        (data_version,) = self.store.query("PRAGMA data_version")[0]
+        with self._lock:
+            cached, cached_version = self._counts, self._counts_version
+            if data_version == self._data_version and cached_version is not None:
+                return cached
+        version = self._version()
+        if version == cached_version:
+            with self._lock:
+                self._data_version = data_version
+            return cached
+        join = "FROM submissions s LEFT JOIN reviews r ON r.submission_id = s.id"
+        if cached_version is not None and cached_version[1] == version[1]:
+            # Only new submissions since the cached counts: count just those.
+            counts = dict(cached)
+            rows = self.store.query(
+                f"SELECT s.category, coalesce(r.status, 'pending'), count(*) {join} WHERE s.id > ? AND s.id <= ? GROUP BY 1, 2",
+                (cached_version[0] or 0, version[0] or 0),
+            )
+            for c, status, n in rows:
+                counts[c, status] = counts.get((c, status), 0) + n
+        else:
+            rows = self.store.query(
+                f"SELECT s.category, coalesce(r.status, 'pending'), count(*) {join} WHERE s.id <= ? GROUP BY 1, 2",
+                (version[0] or 0,),
+            )
+            counts = {(c, status): n for c, status, n in rows}
+        with self._lock:
+            self._counts, self._counts_version, self._data_version = counts, version, data_version
+        return counts
+
+    def decide(self, decisions: dict[int, str], reviewer: str, note: str = "", reviewer_worker_id: str = "") -> None:
+        """Queue approve/reject decisions and wait for their single group commit.
+
+        Raises ValueError, before anything is queued, on an unknown status or
+        a submission made by ``reviewer_worker_id``.
+        """
+        for status in decisions.values():
+            if status not in STATUSES:
+                raise ValueError(f"unknown review status {status!r}")
+        if reviewer_worker_id and decisions:
+            own = self.own_submissions(reviewer_worker_id, list(decisions))
+            if own:
+                raise ValueError(f"reviewers can't decide on their own submissions: {sorted(own)}")
+        for submission_id, status in decisions.items():
+            if status == "pending":
+                self.store.execute_async("DELETE FROM reviews WHERE submission_id = ?", (submission_id,))
+            else:
+                self.store.execute_async(
+                    "INSERT OR REPLACE INTO reviews (submission_id, status, reviewer, note, reviewed_at) "
+                    "VALUES (?, ?, ?, ?, datetime('now'))",
+                    (submission_id, status, reviewer, note),
+                )
+        # Reviewers expect the next page to reflect what they just did.
+        self.store.flush()
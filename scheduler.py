@@ -0,0 +1,213 @@
+"""Process-wide assignment of (filing, section) work units to worker sessions.
+
+Every section of every indexed filing is a work unit. Units wait in a heap
+ordered by how covered they already are: submissions and live leases on the
+unit's ticker first, then submissions from the unit itself, then a random
+rank so equally covered units are spread over the corpus. A worker asks for
+an assignment and gets the best units it may still use (no ticker or section
+it has already submitted) on a lease that is renewed while the session is
+active and returned to the pool after ``LEASE_S`` of inactivity.
+
+Acquire, release and complete take one lock and never wait on disk; leases
+are mirrored to the ``assignments`` table through the store's group commits
+so other app processes skip them. Reading and renewing a worker's lease on a
+rerun takes no lock at all.
+"""
+import heapq
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable
+
+from corpus import Filing
+from layout import FilingLayout
+from reuse import ReuseIndex, section_key
+from store import SubmissionStore
+
+LEASE_S = 30 * 60.0
+# Pool entries looked at per acquire, to bound the time the lock is held.
+MAX_SCAN = 512
+# How often other processes' leases are re-read (on acquire only).
+REFRESH_S = 30.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS assignments (
+    filing_id  TEXT NOT NULL,
+    section    TEXT NOT NULL,
+    worker_id  TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (filing_id, section)
+) WITHOUT ROWID;
+"""
+
+Key = tuple[str, str]  # (filing id, section key)
+
+
+@dataclass(frozen=True)
+class WorkUnit:
+    filing: Filing
+    section: str  # section name as printed, "" for a filing without sections
+    page: int     # page index where the section starts
+
+    @property
+    def key(self) -> Key:
+        return self.filing.filing_id, section_key(self.section)
+
+
+@dataclass
+class Lease:
+    unit: WorkUnit
+    worker_id: str
+    expires_at: float
+    persisted_until: float
+
+
+class Scheduler:
+    """Process-wide; create once (e.g. via ``st.cache_resource``)."""
+
+    def __init__(
+        self,
+        store: SubmissionStore,
+        reuse: ReuseIndex,
+        filings: list[Filing],
+        layout: Callable[[str], FilingLayout],
+        lease_s: float = LEASE_S,
+    ):
+        self.store = store
+        self.reuse = reuse
+        self.lease_s = lease_s
+        store.ensure_schema(SCHEMA)
+
+        self._units: dict[Key, WorkUnit] = {}
+        for filing in filings:
+            sections = layout(filing.sha256).sections
+            for unit in [WorkUnit(filing, s.name, s.page) for s in sections] or [WorkUnit(filing, "", 0)]:
+                self._units.setdefault(unit.key, unit)
+
+        rng = random.Random()
+        self._rank = {key: rng.random() for key in self._units}
+        self._done: Counter = Counter(
+            {(f, s): n for f, s, n in store.query("SELECT filing_id, section, count(*) FROM worker_sections GROUP BY 1, 2")}
+        )
+        # Submissions plus live leases per ticker.
+        self._ticker_load: Counter = Counter(
+            {t: n for t, n in store.query("SELECT ticker, count(*) FROM worker_tickers GROUP BY 1")}
+        )
+
+        self._lock = threading.Lock()
+        self._heap = [(self._priority(key), key) for key in self._units]
+        heapq.heapify(self._heap)
+        self._leases: dict[Key, Lease] = {}
+        self._by_worker: dict[str, tuple[Lease, ...]] = {}
+        self._foreign: set[Key] = set()
+        self._refreshed_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self._units)
+
+    def _priority(self, key: Key) -> tuple[int, int, float]:
+        return self._ticker_load[self._units[key].filing.ticker], self._done[key], self._rank[key]
+
+    # ─── Rerun path ──────────────────────────────────────────────────────────
+    def leases(self, worker_id: str) -> tuple[Lease, ...]:
+        """The worker's live leases, renewed; lock-free."""
+        now = time.time()
+        live = tuple(lease for lease in self._by_worker.get(worker_id, ()) if lease.expires_at > now)
+        for lease in live:
+            lease.expires_at = now + self.lease_s
+            # Other processes only need to see the lease before it would expire.
+            if lease.expires_at - lease.persisted_until > self.lease_s / 2:
+                lease.persisted_until = lease.expires_at
+                self.store.execute_async(
+                    "UPDATE assignments SET expires_at = ? WHERE filing_id = ? AND section = ? AND worker_id = ?",
+                    (lease.expires_at, *lease.unit.key, worker_id),
+                )
+        return live
+
+    # ─── Assignment ──────────────────────────────────────────────────────────
+    def acquire(self, worker_id: str, n: int = 1) -> tuple[Lease, ...]:
+        """Lease up to ``n`` units on distinct tickers, replacing the worker's current leases."""
+        used_tickers, used_sections = self.reuse.used(worker_id)
+        self._refresh()
+        now = time.time()
+        with self._lock:
+            self._release_locked(worker_id)
+            self._expire_locked(now)
+            taken: list[Lease] = []
+            skipped = []
+            tickers = set(used_tickers)
+            for _ in range(MAX_SCAN):
+                if not self._heap or len(taken) == n:
+                    break
+                priority, key = heapq.heappop(self._heap)
+                current = self._priority(key)
+                if current > priority:
+                    # Coverage moved on since this entry was pushed.
+                    heapq.heappush(self._heap, (current, key))
+                    continue
+                unit = self._units[key]
+                if key in self._foreign or key in used_sections or unit.filing.ticker in tickers:
+                    skipped.append((priority, key))
+                    continue
+                lease = Lease(unit, worker_id, now + self.lease_s, now + self.lease_s)
+                self._leases[key] = lease
+                self._ticker_load[unit.filing.ticker] += 1
+                tickers.add(unit.filing.ticker)
+                taken.append(lease)
+            for entry in skipped:
+                heapq.heappush(self._heap, entry)
+            self._by_worker[worker_id] = tuple(taken)
+        for lease in taken:
+            self.store.execute_async(
+                "INSERT OR REPLACE INTO assignments (filing_id, section, worker_id, expires_at) VALUES (?, ?, ?, ?)",
+                (*lease.unit.key, worker_id, lease.expires_at),
+            )
+        return tuple(taken)
+
+    def release(self, worker_id: str) -> None:
+        """Return the worker's leases to the pool."""
+        with self._lock:
+            self._release_locked(worker_id)
+
+    def complete(self, record: dict) -> None:
+        """Count a submission towards coverage and release its worker's leases."""
+        with self._lock:
+            for doc in record["documents"]:
+                section = (doc.get("provenance") or {}).get("found_section") or doc["section_name"]
+                self._done[doc["filing_id"], section_key(section)] += 1
+                self._ticker_load[doc["ticker"].upper()] += 1
+            self._release_locked(record["worker_id"])
+
+    def _release_locked(self, worker_id: str) -> None:
+        for lease in self._by_worker.pop(worker_id, ()):
+            self._drop_locked(lease)
+
+    def _expire_locked(self, now: float) -> None:
+        for lease in [lease for lease in self._leases.values() if lease.expires_at <= now]:
+            self._drop_locked(lease)
+            leases = self._by_worker.get(lease.worker_id, ())
+            if lease in leases:
+                self._by_worker[lease.worker_id] = tuple(x for x in leases if x is not lease)
+
+    def _drop_locked(self, lease: Lease) -> None:
+        key = lease.unit.key
+        if self._leases.get(key) is not lease:
+            return
+        del self._leases[key]
+        self._ticker_load[lease.unit.filing.ticker] -= 1
+        heapq.heappush(self._heap, (self._priority(key), key))
+        self.store.execute_async(
+            "DELETE FROM assignments WHERE filing_id = ? AND section = ? AND worker_id = ?", (*key, lease.worker_id)
+        )
+
+    def _refresh(self) -> None:
+        """Re-read the leases other app processes hold, at most every ``REFRESH_S``."""
+        now = time.time()
+        if now - self._refreshed_at < REFRESH_S:
+            return
+        self._refreshed_at = now
+        rows = self.store.query("SELECT filing_id, section FROM assignments WHERE expires_at > ?", (now,))
+        with self._lock:
+            self._foreign = {key for key in rows if key not in self._leases}
@@ -0,0 +1,197 @@
+"""Ticker/form/period index and BM25 full-text index over the filing corpus.
+
+The index is built offline from ``Corpus`` and written as a directory of
+NumPy arrays that are memory-mapped on load, so opening it is cheap and the
+OS page cache is shared between app processes.
+
+    python search.py build
+    python search.py query "net sales" --ticker AAPL
+"""
+import argparse
+import json
+import math
+import os
+import re
+import shutil
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+
+from corpus import DEFAULT_CORPUS_DIR, Corpus, Filing
+
+DEFAULT_INDEX_DIR = Path(os.environ.get("DA_DATA_DIR", "data")) / "index"
+
+INDEX_VERSION = 1
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+# ─── Build ───────────────────────────────────────────────────────────────────
+@contextmanager
+def replace_dir(out_dir: Path) -> Iterator[Path]:
+    """Yield an empty sibling of ``out_dir`` to write into, then swap it in.
+
+    Readers never see a half-written directory, and if writing fails the
+    current one is left in place.
+    """
+    tmp_dir = out_dir.with_name(out_dir.name + ".tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+    yield tmp_dir
+    old_dir = out_dir.with_name(out_dir.name + ".old")
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if out_dir.exists():
+        out_dir.rename(old_dir)
+    tmp_dir.rename(out_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def build_index(corpus: Corpus, out_dir: Path | str = DEFAULT_INDEX_DIR) -> int:
+    """(Re)build the index for every filing in ``corpus``; returns the filing count."""
+    out_dir = Path(out_dir)
+    # Doc ids follow (ticker, newest period first) so a ticker is one contiguous range.
+    filings = sorted(corpus.filings(), key=lambda f: (f.ticker, f.period, f.form), reverse=True)
+    filings.sort(key=lambda f: f.ticker)
+
+    tickers: dict[str, list[int]] = {}
+    postings: dict[str, tuple[array, array]] = {}
+    doc_len = array("I")
+    for doc_id, filing in enumerate(filings):
+        span = tickers.setdefault(filing.ticker, [doc_id, doc_id])
+        span[1] = doc_id + 1
+        tokens = tokenize(corpus.text(filing))
+        doc_len.append(len(tokens))
+        for term, tf in Counter(tokens).items():
+            docs, tfs = postings.setdefault(term, (array("I"), array("H")))
+            docs.append(doc_id)
+            tfs.append(min(tf, 0xFFFF))
+
+    terms = sorted(postings)
+    offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    np.cumsum([len(postings[t][0]) for t in terms], out=offsets[1:])
+    all_docs = np.empty(offsets[-1], dtype=np.uint32)
+    all_tfs = np.empty(offsets[-1], dtype=np.uint16)
+    for i, term in enumerate(terms):
+        docs, tfs = postings[term]
+        all_docs[offsets[i]:offsets[i + 1]] = docs
+        all_tfs[offsets[i]:offsets[i + 1]] = tfs
+
+    with replace_dir(out_dir) as tmp_dir:
+        np.save(tmp_dir / "offsets.npy", offsets)
+        np.save(tmp_dir / "docs.npy", all_docs)
+        np.save(tmp_dir / "tfs.npy", all_tfs)
+        np.save(tmp_dir / "doc_len.npy", np.frombuffer(doc_len, dtype=np.uint32))
+        (tmp_dir / "terms.json").write_text(json.dumps(terms), encoding="utf-8")
+        meta = {
+            "version": INDEX_VERSION,
+            "filings": [f.to_dict() for f in filings],
+            "tickers": tickers,
+        }
+        (tmp_dir / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+    return len(filings)
+
+
+# ─── Query ───────────────────────────────────────────────────────────────────
+class SearchIndex:
+    def __init__(self, index_dir: Path | str = DEFAULT_INDEX_DIR):
+        index_dir = Path(index_dir)
+        meta = json.loads((index_dir / "meta.json").read_text(encoding="utf-8"))
+        if meta["version"] != INDEX_VERSION:
+            raise ValueError(f"index version {meta['version']} != {INDEX_VERSION}; rebuild with `python search.py build`")
+        self.filings = [Filing(**f) for f in meta["filings"]]
+        self.by_id = {f.filing_id: f for f in self.filings}
+        self.tickers = {t: tuple(span) for t, span in meta["tickers"].items()}
+        terms = json.loads((index_dir / "terms.json").read_text(encoding="utf-8"))
+        self.term_ids = {t: i for i, t in enumerate(terms)}
+
+        self.offsets = np.load(index_dir / "offsets.npy", mmap_mode="r")
+        self.docs = np.load(index_dir / "docs.npy", mmap_mode="r")
+        self.tfs = np.load(index_dir / "tfs.npy", mmap_mode="r")
+        self.doc_len = np.load(index_dir / "doc_len.npy", mmap_mode="r")
+        self.avg_len = float(self.doc_len.mean()) if len(self.doc_len) else 0.0
+
+    @classmethod
+    def load(cls, index_dir: Path | str = DEFAULT_INDEX_DIR) -> "SearchIndex | None":
+        """Open the index, or return None if it has not been built yet."""
+        if not (Path(index_dir) / "meta.json").exists():
+            return None
+        return cls(index_dir)
+
+    def __len__(self) -> int:
+        return len(self.filings)
+
+    def _span(self, ticker: str | None) -> tuple[int, int]:
+        if ticker is None:
+            return 0, len(self.filings)
+        return self.tickers.get(ticker.strip().upper(), (0, 0))
+
+    def lookup(self, ticker: str, form: str | None = None, period: str | None = None) -> list[Filing]:
+        """Filings for a ticker, newest period first."""
+        start, end = self._span(ticker)
+        return [
+            f for f in self.filings[start:end]
+            if (form is None or f.form == form) and (period is None or f.period.startswith(period))
+        ]
+
+    def search(self, query: str, ticker: str | None = None, limit: int = 10) -> list[tuple[Filing, float]]:
+        """BM25-ranked filings for ``query``, optionally restricted to a ticker."""
+        start, end = self._span(ticker)
+        if start == end:
+            return []
+        n_docs = len(self.filings)
+        scores = np.zeros(end - start, dtype=np.float32)
+        for term in set(tokenize(query)):
+            term_id = self.term_ids.get(term)
+            if term_id is None:
+                continue
+            lo, hi = self.offsets[term_id], self.offsets[term_id + 1]
+            docs = np.asarray(self.docs[lo:hi], dtype=np.int64)
+            tfs = np.asarray(self.tfs[lo:hi], dtype=np.float32)
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            mask = (docs >= start) & (docs < end)
+            docs, tfs = docs[mask], tfs[mask]
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_len[docs] / self.avg_len)
+            np.add.at(scores, docs - start, idf * tfs * (BM25_K1 + 1) / (tfs + norm))
+
+        hits = np.flatnonzero(scores)
+        if len(hits) > limit:
+            hits = hits[np.argpartition(scores[hits], -limit)[-limit:]]
+        hits = hits[np.argsort(scores[hits])[::-1]]
+        return [(self.filings[start + i], float(scores[i])) for i in hits]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS_DIR)
+    parser.add_argument("--index", type=Path, default=DEFAULT_INDEX_DIR)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("build", help="rebuild the index from the corpus manifest")
+    query = sub.add_parser("query", help="run a search against the built index")
+    query.add_argument("text")
+    query.add_argument("--ticker")
+    query.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.cmd == "build":
+        n = build_index(Corpus(args.corpus), args.index)
+        print(f"indexed {n} filings into {args.index}")
+    elif args.cmd == "query":
+        index = SearchIndex.load(args.index)
+        if index is None:
+            parser.error(f"no index at {args.index}; run `python search.py build` first")
+        for filing, score in index.search(args.text, ticker=args.ticker, limit=args.limit):
+            print(f"{score:8.3f}  {filing.filing_id}  {filing.title}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""Append-only submission store backed by SQLite in WAL mode.
+
+Writes are queued and flushed by a single background thread in group commits,
+so ``submit()`` never waits on disk. If a group commit fails, its statements
+are retried one at a time so a single bad write can't take the others down
+with it. Reads (counts, recent records) use their
+own connection and the indexes on the ``submissions`` table.
+"""
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_DB_PATH = Path(os.environ.get("DA_DATA_DIR", "data")) / "submissions.db"
+
+# Flush at least this often, or as soon as this many writes are queued.
+COMMIT_INTERVAL_S = 0.05
+COMMIT_BATCH_MAX = 512
+# Attempts per statement when a group commit has failed; busy/locked errors back off.
+WRITE_RETRIES = 3
+RETRY_BACKOFF_S = 0.2
+
+log = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+    id        INTEGER PRIMARY KEY,
+    worker_id TEXT NOT NULL,
+    category  TEXT NOT NULL,
+    ticker    TEXT NOT NULL,
+    ts        TEXT NOT NULL,
+    payload   TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_submissions_worker   ON submissions (worker_id);
+CREATE INDEX IF NOT EXISTS ix_submissions_ticker   ON submissions (ticker);
+CREATE INDEX IF NOT EXISTS ix_submissions_category ON submissions (category);
+CREATE INDEX IF NOT EXISTS ix_submissions_ts       ON submissions (ts);
+"""
+
+INSERT_SUBMISSION = (
+    "INSERT INTO submissions (worker_id, category, ticker, ts, payload) VALUES (?, ?, ?, ?, ?)"
+)
+
+
+def connect(path: Path | str) -> sqlite3.Connection:
+    """Open a connection with the pragmas every store connection shares."""
+    conn = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # WAL + NORMAL only fsyncs at checkpoints, not on every commit.
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    return conn
+
+
+class SubmissionStore:
+    """Process-wide store; create once (e.g. via ``st.cache_resource``)."""
+
+    def __init__(self, path: Path | str = DEFAULT_DB_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._writer_conn = connect(self.path)
+        self._writer_conn.executescript(SCHEMA)
+        self._reader_conn = connect(self.path)
+        self._reader_lock = threading.Lock()
+
+        # Queued writes are (sql, params) pairs; `_inflight` holds the batch
+        # currently being committed so counts stay correct while it is on disk.
+        self._cond = threading.Condition()
+        self._pending: list[tuple[str, tuple]] = []
+        self._inflight: list[tuple[str, tuple]] = []
+        self._closed = False
+        self._error: BaseException | None = None
+        self._writer = threading.Thread(target=self._run, name="submission-writer", daemon=True)
+        self._writer.start()
+        # Drain the queue on interpreter shutdown instead of dropping it.
+        atexit.register(self.close)
+
+    def ensure_schema(self, script: str) -> None:
+        """Create extra tables/indexes (for components that share this database)."""
+        conn = connect(self.path)
+        try:
+            conn.executescript(script)
+        finally:
+            conn.close()
+
+    # ─── Writes ──────────────────────────────────────────────────────────────
+    def submit(self, record: dict) -> None:
+        """Queue a record for the next group commit and return immediately."""
+        params = (
+            record["worker_id"],
+            record["category"],
+            record["ticker"],
+            record["timestamp"],
+            json.dumps(record, separators=(",", ":")),
+        )
+        self.execute_async(INSERT_SUBMISSION, params)
+
+    def execute_async(self, sql: str, params: tuple = ()) -> None:
+        """Queue an arbitrary write to be committed with the next batch."""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("SubmissionStore is closed")
+            self._check_writer()
+            self._pending.append((sql, params))
+            if len(self._pending) >= COMMIT_BATCH_MAX:
+                self._cond.notify()
+
+    def flush(self) -> None:
+        """Block until everything queued so far is committed (raises if the writer has stopped)."""
+        with self._cond:
+            self._cond.notify()
+            self._cond.wait_for(lambda: self._error is not None or (not self._pending and not self._inflight))
+            self._check_writer()
+
+    def close(self) -> None:
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._writer.join()
+        self._writer_conn.close()
+        self._reader_conn.close()
+
+    def _check_writer(self) -> None:
+        if self._error is not None:
+            raise RuntimeError("the submission writer has stopped; queued writes are not being saved") from self._error
+
+    def _run(self) -> None:
+        try:
+            self._write_loop()
+        except BaseException as e:
+            log.critical("submission writer stopped", exc_info=True)
+            with self._cond:
+                self._error = e
+                self._cond.notify_all()
+
+    def _write_loop(self) -> None:
+        while True:
+            with self._cond:
+                if not self._pending and not self._closed:
+                    self._cond.wait(timeout=COMMIT_INTERVAL_S)
+                if not self._pending:
+                    if self._closed:
+                        return
+                    continue
+                self._inflight, self._pending = self._pending, []
+            try:
+                self._commit(self._inflight)
+            finally:
+                with self._cond:
+                    self._inflight = []
+                    self._cond.notify_all()
+
+    def _commit(self, batch: list[tuple[str, tuple]]) -> None:
+        try:
+            with self._writer_conn:
+                for sql, params in batch:
+                    self._writer_conn.execute(sql, params)
+            return
+        except Exception:
+            log.exception("group commit of %d writes failed; retrying them one at a time", len(batch))
+        for sql, params in batch:
+            for attempt in range(1, WRITE_RETRIES + 1):
+                try:
+                    with self._writer_conn:
+                        self._writer_conn.execute(sql, params)
+                    break
+                except sqlite3.OperationalError as e:
+                    # Busy/locked (and disk-full) may clear up; anything else won't.
+                    if attempt < WRITE_RETRIES and any(w in str(e) for w in ("locked", "busy", "full")):
+                        time.sleep(RETRY_BACKOFF_S * attempt)
+                        continue
+                    log.error("dropped write after %d attempt(s): %s %r", attempt, sql, params, exc_info=True)
+                    break
+                except Exception:
+                    log.error("dropped write: %s %r", sql, params, exc_info=True)
+                    break
+
+    def _queued_submissions(self, worker_id: str | None) -> int:
+        with self._cond:
+            return sum(
+                1
+                for sql, params in self._pending + self._inflight
+                if sql is INSERT_SUBMISSION and (worker_id is None or params[0] == worker_id)
+            )
+
+    # ─── Reads ───────────────────────────────────────────────────────────────
+    def query(self, sql: str, params: tuple = ()) -> list[tuple]:
+        with self._reader_lock:
+            return self._reader_conn.execute(sql, params).fetchall()
+
+    def count(self, worker_id: str | None = None) -> int:
+        """Committed + queued submissions, optionally for a single worker."""
+        if worker_id is None:
+            (n,) = self.query("SELECT COUNT(*) FROM submissions")[0]
+        else:
+            (n,) = self.query("SELECT COUNT(*) FROM submissions WHERE worker_id = ?", (worker_id,))[0]
+        return n + self._queued_submissions(worker_id)
+
+    def recent(self, worker_id: str, limit: int = 10) -> list[dict]:
+        rows = self.query(
+            "SELECT payload FROM submissions WHERE worker_id = ? ORDER BY id DESC LIMIT ?",
+            (worker_id, limit),
+        )
+        return [json.loads(p) for (p,) in rows]
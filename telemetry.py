@@ -0,0 +1,247 @@
+"""Per-session timing telemetry and a Prometheus-style metrics endpoint.
+
+The app reports every script rerun (with its duration), every step change
+(with the active time spent in the step) and every submitted task. Events are
+buffered in memory and appended to ``metrics.jsonl`` in batches by a
+background thread, like the submission store's group commits. Aggregated
+counters and histograms are kept in memory and served as Prometheus text on
+``http://127.0.0.1:<port>/metrics``. Aggregates are per process, so each app
+process binds the first free port of ``$DA_METRICS_PORT`` (default 9464) and
+the ``METRICS_PORT_SPAN - 1`` ports after it; scrape the whole range and sum
+across targets.
+
+Active time is wall time between interactions, with each gap capped at
+``IDLE_TIMEOUT_S`` so a tab left open overnight doesn't count.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_METRICS_PATH = Path(os.environ.get("DA_DATA_DIR", "data")) / "metrics.jsonl"
+METRICS_PORT = int(os.environ.get("DA_METRICS_PORT", "9464"))
+METRICS_PORT_SPAN = int(os.environ.get("DA_METRICS_PORT_SPAN", "16"))
+
+FLUSH_INTERVAL_S = 2.0
+FLUSH_BATCH_MAX = 256
+IDLE_TIMEOUT_S = 300.0
+# Reruns kept for the p50/p99 summary.
+RECENT_RERUNS = 4096
+RERUN_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+STEP_BUCKETS = (10, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class SessionClock:
+    """Active-time bookkeeping for one worker session (kept in session state)."""
+    active_s: float = 0.0
+    last_seen: float | None = None
+    step: int | None = None
+    step_started: float = 0.0  # active_s when the current step was entered
+    task_started: float = 0.0  # active_s when the current task was started
+
+    def tick(self, step: int, now: float) -> tuple[int, float] | None:
+        """Account for a rerun; returns (step, active seconds) when a step was left."""
+        if self.last_seen is not None:
+            self.active_s += min(max(now - self.last_seen, 0.0), IDLE_TIMEOUT_S)
+        self.last_seen = now
+        if step == self.step:
+            return None
+        left = (self.step, self.active_s - self.step_started) if self.step is not None else None
+        self.step, self.step_started = step, self.active_s
+        return left
+
+    def finish_task(self) -> float:
+        """Active seconds spent on the task just submitted; starts the next one."""
+        spent = self.active_s - self.task_started
+        self.task_started = self.active_s
+        return spent
+
+
+@dataclass
+class _Histogram:
+    buckets: tuple
+    counts: list[int] = field(default_factory=list)
+    sum: float = 0.0
+    count: int = 0
+
+    def __post_init__(self):
+        self.counts = [0] * len(self.buckets)
+
+    def observe(self, value: float) -> None:
+        for i, upper in enumerate(self.buckets):
+            if value <= upper:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name: str, labels: str = "") -> list[str]:
+        sep = "," if labels else ""
+        out = [f'{name}_bucket{{{labels}{sep}le="{upper}"}} {n}' for upper, n in zip(self.buckets, self.counts)]
+        out.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {self.count}')
+        suffix = f"{{{labels}}}" if labels else ""
+        out.append(f"{name}_sum{suffix} {self.sum:.6f}")
+        out.append(f"{name}_count{suffix} {self.count}")
+        return out
+
+
+class Telemetry:
+    """Process-wide sink; create once (e.g. via ``st.cache_resource``)."""
+
+    def __init__(self, path: Path | str = DEFAULT_METRICS_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.started = time.time()
+
+        self._lock = threading.Lock()
+        self._reruns = _Histogram(RERUN_BUCKETS)
+        self._recent_reruns: deque[float] = deque(maxlen=RECENT_RERUNS)
+        self._steps: dict[int, _Histogram] = {}
+        self._tasks: Counter = Counter()
+        self._task_times: deque[float] = deque()
+        self._active_s = 0.0
+
+        self._cond = threading.Condition()
+        self._buffer: list[dict] = []
+        self._closed = False
+        self._writer = threading.Thread(target=self._run, name="metrics-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+        self._server: ThreadingHTTPServer | None = None
+
+    # ─── Events ──────────────────────────────────────────────────────────────
+    def _emit(self, event: str, **fields) -> None:
+        with self._cond:
+            if self._closed:
+                return
+            self._buffer.append({"ts": round(time.time(), 3), "event": event, **fields})
+            if len(self._buffer) >= FLUSH_BATCH_MAX:
+                self._cond.notify()
+
+    def rerun(self, worker_id: str, step: int, seconds: float) -> None:
+        with self._lock:
+            self._reruns.observe(seconds)
+            self._recent_reruns.append(seconds)
+        self._emit("rerun", worker_id=worker_id, step=step, seconds=round(seconds, 4))
+
+    def step_time(self, worker_id: str, step: int, active_s: float) -> None:
+        with self._lock:
+            self._steps.setdefault(step, _Histogram(STEP_BUCKETS)).observe(active_s)
+            self._active_s += active_s
+        self._emit("step", worker_id=worker_id, step=step, active_s=round(active_s, 2))
+
+    def task_submitted(self, worker_id: str, category: str, active_s: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._tasks[category] += 1
+            self._task_times.append(now)
+        self._emit("task", worker_id=worker_id, category=category, active_s=round(active_s, 2))
+
+    # ─── Writer ──────────────────────────────────────────────────────────────
+    def flush(self) -> None:
+        with self._cond:
+            batch, self._buffer = self._buffer, []
+        if batch:
+            # One append per batch keeps lines from concurrent processes whole.
+            data = "".join(json.dumps(e, separators=(",", ":")) + "\n" for e in batch)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(data)
+
+    def close(self) -> None:
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._writer.join()
+        if self._server is not None:
+            self._server.shutdown()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._closed and len(self._buffer) < FLUSH_BATCH_MAX:
+                    self._cond.wait(timeout=FLUSH_INTERVAL_S)
+                closed = self._closed
+            self.flush()
+            if closed:
+                return
+
+    # ─── Prometheus ──────────────────────────────────────────────────────────
+    def render(self) -> str:
+        """Current aggregates in the Prometheus text exposition format."""
+        now = time.time()
+        with self._lock:
+            while self._task_times and self._task_times[0] < now - 3600:
+                self._task_times.popleft()
+            recent = np.asarray(self._recent_reruns)
+            lines = [
+                "# HELP da_rerun_seconds Script rerun duration.",
+                "# TYPE da_rerun_seconds histogram",
+                *self._reruns.lines("da_rerun_seconds"),
+                "# HELP da_rerun_recent_seconds Rerun duration quantiles over the most recent reruns.",
+                "# TYPE da_rerun_recent_seconds summary",
+            ]
+            for q in (0.5, 0.9, 0.99):
+                value = float(np.quantile(recent, q)) if len(recent) else float("nan")
+                lines.append(f'da_rerun_recent_seconds{{quantile="{q}"}} {value:.6f}')
+            lines += [
+                "# HELP da_step_active_seconds Active time spent in each step.",
+                "# TYPE da_step_active_seconds histogram",
+            ]
+            for step, hist in sorted(self._steps.items()):
+                lines += hist.lines("da_step_active_seconds", f'step="{step}"')
+            lines += ["# HELP da_tasks_submitted_total Submitted tasks.", "# TYPE da_tasks_submitted_total counter"]
+            lines += [f'da_tasks_submitted_total{{category="{c}"}} {n}' for c, n in sorted(self._tasks.items())]
+            lines += [
+                "# HELP da_tasks_per_hour Tasks submitted in the last hour.",
+                "# TYPE da_tasks_per_hour gauge",
+                f"da_tasks_per_hour {len(self._task_times)}",
+                "# HELP da_active_seconds_total Worker active time in completed steps.",
+                "# TYPE da_active_seconds_total counter",
+                f"da_active_seconds_total {self._active_s:.3f}",
+            ]
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int = METRICS_PORT, host: str = "127.0.0.1", span: int = METRICS_PORT_SPAN) -> int | None:
+        """Serve ``/metrics`` in a background thread on the first free port of
+        ``port .. port + span - 1``; returns the port, or None if all are taken."""
+        telemetry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = telemetry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        for candidate in range(port, port + span):
+            try:
+                self._server = ThreadingHTTPServer((host, candidate), Handler)
+            except OSError:
+                # Most likely another app process serves its own metrics there.
+                continue
+            if candidate != port:
+                log.warning("metrics port %d is taken; serving this process's metrics on %d", port, candidate)
+            threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+            return candidate
+        log.warning("metrics ports %d-%d are all taken; this process's metrics are not served", port, port + span - 1)
+        return None
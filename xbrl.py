@@ -0,0 +1,478 @@
+"""Index of XBRL-tagged financial facts for lookup and answer validation.
+
+``build`` streams local XBRL instance documents (``<raw>/<TICKER>/*.xml``)
+with ``iterparse`` in a process pool and keeps the consolidated numeric facts
+(no dimensional contexts). They go into one sorted NumPy table of
+(ticker, concept, period end, duration, value, decimals, unit, filing) that is
+memory-mapped at load time. Rows are ordered by a (ticker id, concept id) key,
+so a ticker's or a concept's facts are one ``searchsorted`` range.
+
+The app uses it to suggest facts in Step 1 and to compare the final answer
+with the tagged values in Step 4, each answer figure only with facts in a
+comparable unit (``COMPARABLE_UNITS``).
+
+    python xbrl.py build path/to/raw --workers 8
+    python xbrl.py lookup AAPL us-gaap:Revenues
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+
+import numpy as np
+
+from corpus import make_filing_id
+from factcheck import Amount, extract_amounts, extract_periods
+from search import replace_dir
+
+DEFAULT_XBRL_DIR = Path(os.environ.get("DA_DATA_DIR", "data")) / "xbrl"
+INDEX_VERSION = 1
+
+FACT_DTYPE = np.dtype([
+    ("key", "<u8"),       # ticker id << 32 | concept id
+    ("end", "<i4"),       # period end, days since 1970-01-01
+    ("days", "<i4"),      # duration in days, 0 for an instant
+    ("value", "<f8"),
+    ("decimals", "i1"),   # XBRL decimals attribute; INF is stored as 127
+    ("unit", "<u2"),
+    ("filing", "<u4"),
+])
+EPOCH = date(1970, 1, 1)
+DECIMALS_INF = 127
+# An answer this close to a tagged value (but not equal) is probably a typo.
+NEAR_MISS = 0.05
+# Fact units an answer figure may be compared with, by the figure's unit:
+# dollar amounts with USD (and per-share USD) facts, percentages with ratios,
+# bare numbers with share counts and ratios.
+COMPARABLE_UNITS = {
+    "USD": lambda unit: unit == "USD" or unit.startswith("USD/"),
+    "%": lambda unit: unit == "pure",
+    "": lambda unit: unit in ("shares", "pure"),
+}
+SUGGESTED_CONCEPTS = (
+    "us-gaap:Revenues",
+    "us-gaap:RevenueFromContractWithCustomerExcludingAssessedTax",
+    "us-gaap:CostOfRevenue",
+    "us-gaap:GrossProfit",
+    "us-gaap:OperatingExpenses",
+    "us-gaap:OperatingIncomeLoss",
+    "us-gaap:NetIncomeLoss",
+    "us-gaap:EarningsPerShareDiluted",
+    "us-gaap:Assets",
+    "us-gaap:Liabilities",
+    "us-gaap:LongTermDebt",
+    "us-gaap:CashAndCashEquivalentsAtCarryingValue",
+    "us-gaap:ResearchAndDevelopmentExpense",
+    "dei:EntityCommonStockSharesOutstanding",
+    "dei:EntityNumberOfEmployees",
+)
+DEI_FIELDS = {"DocumentType": "form", "DocumentPeriodEndDate": "period", "TradingSymbol": "ticker"}
+_CAMEL_RE = re.compile(r"(?<=[a-z])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])")
+
+
+def _days(iso: str) -> int:
+    return (date.fromisoformat(iso.strip()[:10]) - EPOCH).days
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+# ─── Parsing ─────────────────────────────────────────────────────────────────
+@dataclass
+class ParsedInstance:
+    path: Path
+    filing_id: str = ""
+    ticker: str = ""
+    period: str = ""
+    rows: list[tuple] = field(default_factory=list)  # (concept, end, days, value, decimals, unit)
+    error: str = ""
+
+
+def parse_instance(path: Path) -> ParsedInstance:
+    """Consolidated numeric facts of one XBRL instance document."""
+    result = ParsedInstance(path)
+    prefixes: dict[str, str] = {}
+    contexts: dict[str, tuple[int, int] | None] = {}
+    units: dict[str, str] = {}
+    raw: list[tuple[str, str, str, str, str]] = []
+    dei: dict[str, str] = {}
+    try:
+        for event, elem in ET.iterparse(path, events=("start-ns", "end")):
+            if event == "start-ns":
+                prefix, uri = elem
+                prefixes.setdefault(uri, prefix)
+                continue
+            local = _local(elem.tag)
+            if local == "context":
+                contexts[elem.get("id")] = _context_period(elem)
+                elem.clear()
+            elif local == "unit":
+                units[elem.get("id")] = _unit_name(elem)
+                elem.clear()
+            elif elem.get("contextRef") is not None:
+                uri = elem.tag[1:].split("}", 1)[0] if elem.tag.startswith("{") else ""
+                concept = f"{prefixes.get(uri, '')}:{local}".lstrip(":")
+                if local in DEI_FIELDS and elem.text:
+                    dei[DEI_FIELDS[local]] = elem.text.strip()
+                if elem.get("unitRef") is not None and elem.text and elem.text.strip():
+                    raw.append((concept, elem.get("contextRef"), elem.get("unitRef"), elem.text.strip(), elem.get("decimals", "INF")))
+                elem.clear()
+    except (ET.ParseError, OSError) as e:
+        result.error = str(e)
+        return result
+
+    result.ticker = (dei.get("ticker") or path.parent.name).upper()
+    form, period = dei.get("form", ""), dei.get("period", "")
+    if not (form and period):
+        result.error = "missing dei:DocumentType / dei:DocumentPeriodEndDate"
+        return result
+    result.period = period[:10]
+    result.filing_id = make_filing_id(result.ticker, form, result.period)
+    for concept, context_ref, unit_ref, text, decimals in raw:
+        period_key = contexts.get(context_ref)
+        if period_key is None:  # dimensional or unknown context
+            continue
+        try:
+            value = float(Decimal(text))
+        except InvalidOperation:
+            continue
+        try:
+            dec = DECIMALS_INF if decimals.upper() == "INF" else max(-127, min(126, int(decimals)))
+        except ValueError:
+            dec = DECIMALS_INF
+        result.rows.append((concept, *period_key, value, dec, units.get(unit_ref, unit_ref)))
+    return result
+
+
+def _context_period(elem: ET.Element) -> tuple[int, int] | None:
+    """(end day, duration days) of a context without dimensions, else None."""
+    instant = start = end = None
+    for child in elem.iter():
+        local = _local(child.tag)
+        if local in ("segment", "scenario"):
+            return None
+        if local == "instant":
+            instant = child.text
+        elif local == "startDate":
+            start = child.text
+        elif local == "endDate":
+            end = child.text
+    try:
+        if instant:
+            return _days(instant), 0
+        if start and end:
+            return _days(end), _days(end) - _days(start)
+    except ValueError:
+        pass
+    return None
+
+
+def _unit_name(elem: ET.Element) -> str:
+    measures = [m.text.split(":")[-1] for m in elem.iter() if _local(m.tag) == "measure" and m.text]
+    return "/".join(measures)
+
+
+# ─── Build ───────────────────────────────────────────────────────────────────
+def build_index(raw_dir: Path, out_dir: Path | str = DEFAULT_XBRL_DIR, workers: int | None = None) -> int:
+    """(Re)build the fact table from every instance under ``raw_dir``; returns the fact count."""
+    out_dir = Path(out_dir)
+    paths = sorted(p for p in raw_dir.rglob("*.xml") if p.is_file())
+    parsed = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for result in pool.map(parse_instance, paths, chunksize=4):
+            if result.error:
+                print(f"skip {result.path}: {result.error}", file=sys.stderr)
+            elif result.rows:
+                parsed.append(result)
+
+    tickers = sorted({p.ticker for p in parsed})
+    concepts = sorted({row[0] for p in parsed for row in p.rows})
+    unit_names = sorted({row[5] for p in parsed for row in p.rows})
+    # Later filings win when the same fact is repeated (e.g. prior-year comparatives).
+    parsed.sort(key=lambda p: p.period)
+    filings = [p.filing_id for p in parsed]
+    ticker_ids = {t: i for i, t in enumerate(tickers)}
+    concept_ids = {c: i for i, c in enumerate(concepts)}
+    unit_ids = {u: i for i, u in enumerate(unit_names)}
+
+    table = np.empty(sum(len(p.rows) for p in parsed), dtype=FACT_DTYPE)
+    i = 0
+    for filing_id, p in enumerate(parsed):
+        n = len(p.rows)
+        concept, end, days, value, dec, unit = zip(*p.rows)
+        table["key"][i:i + n] = [ticker_ids[p.ticker] << 32 | concept_ids[c] for c in concept]
+        table["end"][i:i + n] = end
+        table["days"][i:i + n] = days
+        table["value"][i:i + n] = value
+        table["decimals"][i:i + n] = dec
+        table["unit"][i:i + n] = [unit_ids[u] for u in unit]
+        table["filing"][i:i + n] = filing_id
+        i += n
+    # Sort by key and keep the newest filing's row per (key, period, unit).
+    order = np.lexsort((-np.arange(len(table)), table["unit"], table["days"], table["end"], table["key"]))
+    table = table[order]
+    keep = np.ones(len(table), dtype=bool)
+    keep[1:] = np.any([table[name][1:] != table[name][:-1] for name in ("key", "end", "days", "unit")], axis=0)
+    table = table[keep]
+
+    with replace_dir(out_dir) as tmp_dir:
+        np.save(tmp_dir / "facts.npy", table)
+        meta = {
+            "version": INDEX_VERSION,
+            "tickers": tickers,
+            "concepts": concepts,
+            "units": unit_names,
+            "filings": filings,
+        }
+        (tmp_dir / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+    return len(table)
+
+
+# ─── Query ───────────────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class Fact:
+    ticker: str
+    concept: str
+    start: str  # "" for an instant
+    end: str
+    value: float
+    decimals: int | None  # None for INF (exact)
+    unit: str
+    filing_id: str
+
+    @property
+    def label(self) -> str:
+        return _CAMEL_RE.sub(" ", self.concept.split(":")[-1])
+
+    @property
+    def period(self) -> str:
+        return f"{self.start} to {self.end}" if self.start else f"as of {self.end}"
+
+    def display_value(self) -> str:
+        prefix = "$" if self.unit.startswith("USD") else ""
+        suffix = f" {self.unit}" if self.unit and not self.unit.startswith("USD") else ""
+        if self.decimals is not None and self.decimals <= -3:
+            # Rounded to thousands or more: show it the way the filing's tables do.
+            exp = min(-self.decimals // 3 * 3, 9)
+            word = {3: "thousand", 6: "million", 9: "billion"}[exp]
+            return f"{prefix}{self.value / 10 ** exp:,.0f} {word}{suffix}"
+        places = max(self.decimals or 0, 0)
+        return f"{prefix}{self.value:,.{places}f}{suffix}"
+
+    def to_dict(self) -> dict:
+        return {
+            "concept": self.concept, "period": self.period, "value": self.value,
+            "unit": self.unit, "filing_id": self.filing_id,
+        }
+
+
+@dataclass
+class XbrlCheck:
+    status: str  # "confirmed", "near_miss", "unknown", "no_facts" or "no_number"
+    confirmed: list[Fact] = field(default_factory=list)
+    near_misses: list[tuple[str, Fact]] = field(default_factory=list)  # (answer figure, closest fact)
+
+    @property
+    def issues(self) -> list[str]:
+        return [
+            f"'{raw}' is close to but not the tagged {f.label} for {f.period} ({f.display_value()})"
+            for raw, f in self.near_misses
+        ]
+
+    def to_dict(self) -> dict:
+        return {
+            "status": self.status,
+            "confirmed": [f.to_dict() for f in self.confirmed],
+            "near_misses": [{"answer": raw, **f.to_dict()} for raw, f in self.near_misses],
+        }
+
+
+def _period_mask(facts: np.ndarray, text: str) -> np.ndarray | None:
+    """Rows whose period matches a period named in ``text`` (None if it names none)."""
+    mask = None
+    for p in extract_periods(text):
+        kind, _, when = p.key.partition(":")
+        try:
+            if kind.endswith("M"):
+                days = int(kind[:-1]) * 365 // 12
+                m = (facts["end"] == _days(when)) & (np.abs(facts["days"] - days) <= 15)
+            elif kind == "D":
+                m = facts["end"] == _days(when)
+            else:  # FY:2024 or Q4:2024 -- a period ending in that year
+                year = int(when)
+                days = 365 if kind == "FY" else 91
+                m = (facts["end"] >= _days(f"{year}-01-01")) & (facts["end"] <= _days(f"{year}-12-31"))
+                m &= np.abs(facts["days"] - days) <= 15
+        except ValueError:
+            continue
+        mask = m if mask is None else mask | m
+    return mask
+
+
+class XbrlIndex:
+    def __init__(self, index_dir: Path | str = DEFAULT_XBRL_DIR):
+        index_dir = Path(index_dir)
+        meta = json.loads((index_dir / "meta.json").read_text(encoding="utf-8"))
+        if meta["version"] != INDEX_VERSION:
+            raise ValueError(f"xbrl index version {meta['version']} != {INDEX_VERSION}; rebuild with `python xbrl.py build`")
+        self.tickers = meta["tickers"]
+        self.concepts = meta["concepts"]
+        self.units = meta["units"]
+        self.filings = meta["filings"]
+        self.ticker_ids = {t: i for i, t in enumerate(self.tickers)}
+        self.concept_ids = {c: i for i, c in enumerate(self.concepts)}
+        self.comparable_units = {
+            kind: np.asarray([i for i, u in enumerate(self.units) if accepts(u)], dtype=np.uint16)
+            for kind, accepts in COMPARABLE_UNITS.items()
+        }
+        self.table = np.load(index_dir / "facts.npy", mmap_mode="r")
+        self.keys = self.table["key"]
+
+    @classmethod
+    def load(cls, index_dir: Path | str = DEFAULT_XBRL_DIR) -> "XbrlIndex | None":
+        """Open the index, or return None if it has not been built yet."""
+        if not (Path(index_dir) / "meta.json").exists():
+            return None
+        return cls(index_dir)
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def _rows(self, ticker: str, concept: str | None = None) -> np.ndarray:
+        t = self.ticker_ids.get(ticker.strip().upper())
+        if t is None or (concept is not None and concept not in self.concept_ids):
+            return self.table[:0]
+        if concept is None:
+            lo, hi = np.uint64(t << 32), np.uint64((t + 1) << 32)
+        else:
+            lo = np.uint64(t << 32 | self.concept_ids[concept])
+            hi = lo + np.uint64(1)
+        start, end = np.searchsorted(self.keys, [lo, hi])
+        return self.table[start:end]
+
+    def _fact(self, row, ticker: str) -> Fact:
+        end = EPOCH + timedelta(days=int(row["end"]))
+        start = end - timedelta(days=int(row["days"])) if row["days"] else None
+        return Fact(
+            ticker=ticker,
+            concept=self.concepts[int(row["key"]) & 0xFFFFFFFF],
+            start=start.isoformat() if start else "",
+            end=end.isoformat(),
+            value=float(row["value"]),
+            decimals=None if row["decimals"] == DECIMALS_INF else int(row["decimals"]),
+            unit=self.units[row["unit"]],
+            filing_id=self.filings[row["filing"]],
+        )
+
+    def facts(self, ticker: str, concept: str | None = None) -> list[Fact]:
+        ticker = ticker.strip().upper()
+        return [self._fact(row, ticker) for row in self._rows(ticker, concept)]
+
+    def suggest(self, ticker: str, limit: int = 12) -> list[Fact]:
+        """Latest value of common headline concepts for ``ticker``."""
+        ticker = ticker.strip().upper()
+        out = []
+        for concept in SUGGESTED_CONCEPTS:
+            rows = self._rows(ticker, concept)
+            if len(rows):
+                # Latest period end; for flows, prefer the longest period ending then.
+                best = rows[np.lexsort((rows["days"], rows["end"]))[-1]]
+                out.append(self._fact(best, ticker))
+            if len(out) == limit:
+                break
+        return out
+
+    def check(self, tickers: list[str], final_answer: str, context: str = "") -> XbrlCheck:
+        """Compare the answer's figures with facts tagged for ``tickers`` in the periods ``context`` names."""
+        amounts = extract_amounts(final_answer)
+        if not amounts:
+            return XbrlCheck("no_number")
+        per_ticker = [(t.upper(), self._rows(t)) for t in tickers]
+        per_ticker = [(t, rows) for t, rows in per_ticker if len(rows)]
+        if not per_ticker:
+            return XbrlCheck("no_facts")
+
+        result = XbrlCheck("unknown")
+        for amount in amounts:
+            best: tuple[float, str, object] | None = None
+            for ticker, rows in per_ticker:
+                mask = _period_mask(rows, context)
+                units = np.isin(rows["unit"], self.comparable_units.get(amount.unit, self.comparable_units[""]))
+                candidates = rows[units if mask is None else mask & units]
+                if not len(candidates):
+                    continue
+                hit, near = self._compare(amount, candidates)
+                if hit is not None:
+                    result.confirmed.append(self._fact(candidates[hit], ticker))
+                    best = None
+                    break
+                if near is not None and (best is None or near[0] < best[0]):
+                    best = (near[0], ticker, candidates[near[1]])
+            if best is not None:
+                result.near_misses.append((amount.raw, self._fact(best[2], best[1])))
+        if result.near_misses:
+            result.status = "near_miss"
+        elif result.confirmed:
+            result.status = "confirmed"
+        return result
+
+    def _compare(self, amount: Amount, rows: np.ndarray) -> tuple[int | None, tuple[float, int] | None]:
+        """(index of an equal row, (relative error, index) of the nearest close row)."""
+        values = np.asarray(rows["value"], dtype=np.float64)
+        decimals = np.asarray(rows["decimals"], dtype=np.float64)
+        fact_tol = np.where(decimals == DECIMALS_INF, 0.0, 0.5 * 10.0 ** -decimals)
+        if amount.unit == "%":
+            targets = [(float(amount.value) / 100, float(amount.precision) / 100)]
+        elif amount.scaled:
+            targets = [(float(amount.value), float(amount.precision))]
+        else:
+            # Table figures are often stated "in millions" once, in the header.
+            targets = [(float(amount.value) * f, float(amount.precision) * f) for f in (1, 1e3, 1e6, 1e9)]
+        near = None
+        for target, tol in targets:
+            diff = np.abs(values - target)
+            equal = np.flatnonzero(diff <= np.maximum(fact_tol, tol))
+            if len(equal):
+                return int(equal[0]), None
+            with np.errstate(divide="ignore", invalid="ignore"):
+                rel = np.where(values != 0, diff / np.abs(values), np.inf)
+            i = int(np.argmin(rel))
+            if rel[i] <= NEAR_MISS and (near is None or rel[i] < near[0]):
+                near = (float(rel[i]), i)
+        return None, near
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    build = sub.add_parser("build", help="build the fact index from XBRL instance documents")
+    build.add_argument("raw_dir", type=Path)
+    build.add_argument("--workers", type=int, default=os.cpu_count())
+    build.add_argument("--index", type=Path, default=DEFAULT_XBRL_DIR)
+    lookup = sub.add_parser("lookup", help="print the tagged facts for a ticker")
+    lookup.add_argument("ticker")
+    lookup.add_argument("concept", nargs="?")
+    lookup.add_argument("--index", type=Path, default=DEFAULT_XBRL_DIR)
+    args = parser.parse_args()
+
+    if args.cmd == "build":
+        n = build_index(args.raw_dir, args.index, args.workers)
+        print(f"indexed {n} facts into {args.index}")
+    else:
+        index = XbrlIndex.load(args.index)
+        if index is None:
+            sys.exit(f"no xbrl index at {args.index}; run `python xbrl.py build` first")
+        for fact in index.facts(args.ticker, args.concept):
+            print(f"{fact.concept}\t{fact.period}\t{fact.display_value()}\t{fact.filing_id}")
+
+
+if __name__ == "__main__":
+    main()